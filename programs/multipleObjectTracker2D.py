@@ -18,15 +18,20 @@
 
 # Libraries
 from __future__ import print_function
+import argparse
 import configparser
 import cv2
+import collections
+import concurrent.futures
 import datetime
 from halo import Halo
+import json
 import numpy as np
+import os
 import platform
 from random import randint
+import threading
 import time
-import yarp
 
 
 class MultipleObjectTracker2D:
@@ -38,7 +43,58 @@ class MultipleObjectTracker2D:
         self.systemResponse = Halo(spinner='dots')
 
         # Build object tracker types
-        self.objectTrackerTypes = ['BOOSTING', 'MIL', 'KCF','TLD', 'MEDIANFLOW', 'GOTURN', 'MOSSE', 'CSRT']
+        self.objectTrackerTypes = ['BOOSTING', 'MIL', 'KCF','TLD', 'MEDIANFLOW', 'GOTURN', 'MOSSE', 'CSRT', 'CASCADE']
+
+        # Build empty configuration data until config.ini is read
+        self.authenticationData = configparser.ConfigParser()
+        self.dataFormat = "string"
+
+        # Build default tracker engine configuration
+        self.trackerEngineType = "parallel"
+        self.trackerThreads = 0
+        self.trackerPool = None
+        self.trackingScale = 1.0
+        self.regionPadding = 1.0
+        self.regionMargin = 0.25
+
+        # Build default detection configuration
+        self.displayOutput = 1
+        self.targetDetector = None
+        self.detectorInterval = 30
+
+        # Build default track store
+        self.trackStore = TrackStore("greedy", 0.3, 3, 10, 300, None, None)
+        self.galleryUpdateInterval = 10
+
+        # Build tracking state: targets checked, tracker engine, processed frames and pending seed boxes
+        self.checkTargets = 0
+        self.trackerEngine = None
+        self.processedFrames = 0
+        self.droppedFrames = 0
+        self.skippedFrames = 0
+        self.frameScheduler = None
+        self.frameRecorder = None
+        self.tracksOutput = None
+        self.overlayRenderer = OverlayRenderer()
+        self.logRateLimiter = LogRateLimiter(0)
+        self.trackSnapshot = None
+        self.trajectorySink = None
+        self.configurationWatcher = None
+        self.rebuildTrackerEngine = 0
+        self.seedBoxes = None
+
+        # Set when key q is pressed, processing stops after current frame
+        self.stopRequests = 0
+
+        # Optional settings are only listed with --verbose
+        self.verboseOutput = 0
+
+        # Interactive selection allowed, headless trackers re-seed from seed boxes or wait for detector instead
+        self.selectTargets = 1
+        self.reseedBoxes = None
+
+        # Build disabled performance monitor
+        self.performanceMonitor = PerformanceMonitor(0, 300, 5, "", "null")
 
     # Function: getSystemPlatform
     def getSystemPlatform(self):
@@ -66,6 +122,8 @@ class MultipleObjectTracker2D:
         print("**************************************************************************\n")
 
         loopControlFileExists = 0
+        configurationMissing = 0
+        retryInterval = 0.25
 
         while int(loopControlFileExists) == 0:
             try:
@@ -84,299 +142,4575 @@ class MultipleObjectTracker2D:
                 yarpSend = authenticationData['YARP']['yarp-send']
                 yarpReceive = authenticationData['YARP']['yarp-receive']
 
+                # Optional data output format, string by default for backward compatibility
+                self.dataFormat = str(authenticationData['YARP'].get('data-format', 'string')).strip().lower()
+
                 print("Video Source: " + str(videoSource))
                 print("Image width: " + str(imageWidth))
                 print("Image height: " + str(imageHeight))
                 print("Tracker Type: " + str(trackerType))
 
-                print("YARP Send: " + str(yarpSend))
-                print("YARP Receive: " + str(yarpReceive))
+                print("YARP Send: " + str(yarpSend))
+                print("YARP Receive: " + str(yarpReceive))
+                self.printConfiguration("YARP Data Format: " + str(self.dataFormat))
+
+                # Convert image from string to int
+                imageWidth = int(imageWidth)
+                imageHeight = int(imageHeight)
+
+                # Save configuration data to read optional sections
+                self.authenticationData = authenticationData
+
+                # Exit loop
+                loopControlFileExists = 1
+
+            except:
+
+                # Report once, then start as soon as config.ini is ready
+                if int(configurationMissing) == 0:
+                    systemResponseMessage = "\n[ERROR] Sorry, config.ini not founded, waiting for it ...\n"
+                    self.systemResponse.text_color = "red"
+                    self.systemResponse.fail(systemResponseMessage)
+                    configurationMissing = 1
+
+                # Start soon after config.ini appears, then poll less often
+                time.sleep(retryInterval)
+                retryInterval = min(4.0, retryInterval * 2)
+
+        systemResponseMessage = "\n[INFO] Data obtained correctly.\n"
+        self.systemResponse.text_color = "green"
+        self.systemResponse.succeed(systemResponseMessage)
+
+        return videoSource, imageWidth, imageHeight, trackerType, yarpSend, yarpReceive
+
+    # Function: getConfigurationData
+    def getConfigurationData(self):
+
+        # Plain sections, sent to worker processes instead of reading config.ini again
+        return {sectionName: dict(self.authenticationData[sectionName]) for sectionName in self.authenticationData.sections()}
+
+    # Function: setConfigurationData
+    def setConfigurationData(self, configurationData):
+
+        self.authenticationData = configparser.ConfigParser()
+        self.authenticationData.read_dict(configurationData)
+        self.dataFormat = str(self.authenticationData['YARP'].get('data-format', 'string')).strip().lower()
+
+    # Function: getConfigurationValue
+    def getConfigurationValue(self, section, key, defaultValue):
+
+        # Get optional configuration value, use default value if not configured
+        try:
+            configurationValue = self.authenticationData[section][key]
+
+        except:
+            configurationValue = defaultValue
+
+        return configurationValue
+
+    # Function: printConfiguration
+    def printConfiguration(self, configurationLine):
+
+        if int(self.verboseOutput) == 1:
+            print(configurationLine)
+
+    # Function: getReloadConfiguration
+    def getReloadConfiguration(self):
+
+        configReload = self.getConfigurationValue('Configuration', 'config-reload', '0')
+        configReloadInterval = self.getConfigurationValue('Configuration', 'config-reload-interval', '1')
+
+        self.printConfiguration("Config Reload: " + str(configReload))
+        self.printConfiguration("Config Reload Interval: " + str(configReloadInterval) + " s")
+
+        # Watch config.ini between frames
+        if int(configReload) == 1:
+            self.configurationWatcher = ConfigurationWatcher('../config/config.ini', float(configReloadInterval))
+
+        else:
+            self.configurationWatcher = None
+
+        return self.configurationWatcher
+
+    # Function: reloadConfiguration
+    def reloadConfiguration(self, trackerType, imageWidth, imageHeight):
+
+        print("\n**************************************************************************")
+        print("Reloading configuration:")
+        print("**************************************************************************\n")
+
+        authenticationData = configparser.ConfigParser()
+
+        try:
+            authenticationData.read('../config/config.ini')
+            newTrackerType = authenticationData['Configuration']['tracker-type']
+            newImageWidth = int(authenticationData['Configuration']['image-width'])
+            newImageHeight = int(authenticationData['Configuration']['image-height'])
+
+        except:
+            systemResponseMessage = "\n[ERROR] Sorry, config.ini could not be reloaded, keeping current configuration.\n"
+            self.systemResponse.text_color = "red"
+            self.systemResponse.fail(systemResponseMessage)
+
+            return trackerType, imageWidth, imageHeight
+
+        previousData = self.authenticationData
+        self.authenticationData = authenticationData
+
+        # Sections changed since last read
+        changedSections = [section for section in sorted(set(previousData.sections()) | set(authenticationData.sections())) if section not in previousData or section not in authenticationData or dict(previousData[section]) != dict(authenticationData[section])]
+
+        # Tracker engine follows tracker type and tracker section
+        if 'Tracker' in changedSections:
+            previousThreads = self.trackerThreads
+            self.getTrackerConfiguration()
+
+            # New pool size for next tracker engine, current engine finishes on old pool
+            if self.trackerThreads != previousThreads and self.trackerPool is not None:
+                self.trackerPool.shutdown(wait=False)
+                self.trackerPool = None
+
+        # Cascade policies are read when trackers are built
+        cascadeChanged = any(section.startswith('Cascade') for section in changedSections)
+
+        if 'Tracker' in changedSections or cascadeChanged or newTrackerType != trackerType:
+            print("Tracker Type: " + str(newTrackerType))
+            self.rebuildTrackerEngine = 1
+
+            if self.trackSnapshot is not None:
+                self.trackSnapshot.trackerType = str(newTrackerType)
+
+        # New resize size, tracks follow image scale
+        if newImageWidth != imageWidth or newImageHeight != imageHeight:
+            print("Image width: " + str(newImageWidth))
+            print("Image height: " + str(newImageHeight))
+
+            self.trackStore.scaleTracks(float(newImageWidth) / imageWidth, float(newImageHeight) / imageHeight)
+            self.rebuildTrackerEngine = 1
+
+        previousDisplay = self.displayOutput
+
+        # Detector is rebuilt only for its own section, background model and loaded models are kept otherwise
+        if 'Detection' in changedSections:
+            self.getDetectionConfiguration()
+
+        # Display and logs
+        elif 'Configuration' in changedSections:
+            self.getOutputConfiguration()
+
+        if previousDisplay == 1 and self.displayOutput == 0:
+            cv2.destroyAllWindows()
+
+        # Capture devices, ports and stored tracks are kept, their sections need a restart
+        restartSections = [section for section in changedSections if section not in ['Configuration', 'Tracker', 'Detection'] and not section.startswith('Cascade')]
+
+        if previousData.get('Configuration', 'video-source', fallback=None) != authenticationData.get('Configuration', 'video-source', fallback=None):
+            restartSections.append('video-source')
+
+        if len(restartSections) > 0:
+            systemResponseMessage = "\n[INFO] Changes in " + ", ".join(restartSections) + " will be applied on restart.\n"
+            self.systemResponse.text_color = "yellow"
+            self.systemResponse.warn(systemResponseMessage)
+
+        systemResponseMessage = "\n[INFO] Configuration reloaded.\n"
+        self.systemResponse.text_color = "green"
+        self.systemResponse.succeed(systemResponseMessage)
+
+        return newTrackerType, newImageWidth, newImageHeight
+
+    # Function: getCaptureConfiguration
+    def getCaptureConfiguration(self):
+
+        captureThread = self.getConfigurationValue('Capture', 'capture-thread', '1')
+        capturePolicy = self.getConfigurationValue('Capture', 'capture-policy', 'latest')
+        captureQueueSize = self.getConfigurationValue('Capture', 'capture-queue-size', '4')
+
+        self.printConfiguration("Capture Thread: " + str(captureThread))
+        self.printConfiguration("Capture Policy: " + str(capturePolicy))
+        self.printConfiguration("Capture Queue Size: " + str(captureQueueSize))
+
+        return int(captureThread), str(capturePolicy).strip().lower(), int(captureQueueSize)
+
+    # Function: getPublishConfiguration
+    def getPublishConfiguration(self):
+
+        publishAsync = self.getConfigurationValue('YARP', 'publish-async', '1')
+        publishQueueSize = self.getConfigurationValue('YARP', 'publish-queue-size', '2')
+        publishImageFPS = self.getConfigurationValue('YARP', 'publish-image-fps', '0')
+
+        self.printConfiguration("Publish Async: " + str(publishAsync))
+        self.printConfiguration("Publish Queue Size: " + str(publishQueueSize))
+        self.printConfiguration("Publish Image FPS: " + str(publishImageFPS))
+
+        return int(publishAsync), int(publishQueueSize), float(publishImageFPS)
+
+    # Function: getOutputPublishers
+    def getOutputPublishers(self, outputImagePort, outputDataPort):
+
+        publishAsync, publishQueueSize, publishImageFPS = self.getPublishConfiguration()
+
+        # Blocking writes on tracking thread
+        if publishAsync == 0:
+            return outputImagePort, outputDataPort
+
+        # Publisher threads write, tracking thread only enqueues
+        outputImagePort = AsyncPortPublisher(outputImagePort, publishQueueSize, publishImageFPS)
+        outputDataPort = AsyncPortPublisher(outputDataPort, publishQueueSize, 0)
+
+        return outputImagePort, outputDataPort
+
+    # Function: getSnapshotConfiguration
+    def getSnapshotConfiguration(self, trackerType):
+
+        snapshotEnabled = self.getConfigurationValue('Snapshot', 'snapshot', '0')
+        snapshotFile = self.getConfigurationValue('Snapshot', 'snapshot-file', '../snapshot/tracks.npz')
+        snapshotInterval = self.getConfigurationValue('Snapshot', 'snapshot-interval', '5')
+        snapshotMaxAge = self.getConfigurationValue('Snapshot', 'snapshot-max-age', '60')
+
+        self.printConfiguration("Snapshot: " + str(snapshotEnabled))
+        self.printConfiguration("Snapshot File: " + str(snapshotFile))
+        self.printConfiguration("Snapshot Interval: " + str(snapshotInterval))
+        self.printConfiguration("Snapshot Max Age: " + str(snapshotMaxAge))
+
+        if int(snapshotEnabled) == 1:
+            self.trackSnapshot = TrackSnapshot(snapshotFile, float(snapshotInterval), float(snapshotMaxAge), trackerType)
+
+        else:
+            self.trackSnapshot = None
+
+        return self.trackSnapshot
+
+    # Function: restoreSnapshot
+    def restoreSnapshot(self, trackerType, imageWidth, imageHeight):
+
+        snapshotData = self.trackSnapshot.load()
+
+        if snapshotData is None:
+            return
+
+        trackState, snapshotFrame = snapshotData
+
+        # Snapshot taken at another resolution can not be reused
+        if snapshotFrame.shape[1] != imageWidth or snapshotFrame.shape[0] != imageHeight:
+            systemResponseMessage = "\n[ERROR] Sorry, snapshot frame size does not match image size, targets must be selected again.\n"
+            self.systemResponse.text_color = "red"
+            self.systemResponse.fail(systemResponseMessage)
+            return
+
+        self.trackStore.setState(trackState)
+
+        # Trackers learn appearance from snapshot frame, next live frame is already an update
+        if self.trackStore.getActive().any():
+            self.trackerEngine = self.buildTrackerEngine(trackerType, snapshotFrame)
+            self.checkTargets = 1
+
+        systemResponseMessage = "\n[INFO] Tracking resumed from snapshot with " + str(int(self.trackStore.getActive().sum())) + " active targets.\n"
+        self.systemResponse.text_color = "green"
+        self.systemResponse.succeed(systemResponseMessage)
+
+    # Function: getRecordingConfiguration
+    def getRecordingConfiguration(self):
+
+        recordEnabled = self.getConfigurationValue('Recording', 'record', '0')
+        recordPath = self.getConfigurationValue('Recording', 'record-path', '../recordings')
+        recordChunkFrames = self.getConfigurationValue('Recording', 'record-chunk-frames', '100')
+        recordCompression = self.getConfigurationValue('Recording', 'record-compression', '1')
+
+        self.printConfiguration("Record: " + str(recordEnabled))
+        self.printConfiguration("Record Path: " + str(recordPath))
+        self.printConfiguration("Record Chunk Frames: " + str(recordChunkFrames))
+        self.printConfiguration("Record Compression: " + str(recordCompression))
+
+        # One recording directory per run
+        if int(recordEnabled) == 1:
+            recordPath = os.path.join(str(recordPath), datetime.datetime.now().strftime("%Y%m%d-%H%M%S"))
+            self.frameRecorder = FrameRecorder(recordPath, int(recordChunkFrames), int(recordCompression))
+
+        else:
+            self.frameRecorder = None
+
+        return self.frameRecorder
+
+    # Function: getTrajectoryConfiguration
+    def getTrajectoryConfiguration(self):
+
+        trajectoriesEnabled = self.getConfigurationValue('Trajectories', 'trajectories', '0')
+        trajectoriesPath = self.getConfigurationValue('Trajectories', 'trajectories-path', '../trajectories')
+        trajectoriesFlushRows = self.getConfigurationValue('Trajectories', 'trajectories-flush-rows', '10000')
+        trajectoriesFlushInterval = self.getConfigurationValue('Trajectories', 'trajectories-flush-interval', '5')
+        trajectoriesRotateRows = self.getConfigurationValue('Trajectories', 'trajectories-rotate-rows', '1000000')
+        trajectoriesRotateInterval = self.getConfigurationValue('Trajectories', 'trajectories-rotate-interval', '3600')
+
+        self.printConfiguration("Trajectories: " + str(trajectoriesEnabled))
+        self.printConfiguration("Trajectories Path: " + str(trajectoriesPath))
+        self.printConfiguration("Trajectories Flush Rows: " + str(trajectoriesFlushRows))
+        self.printConfiguration("Trajectories Flush Interval: " + str(trajectoriesFlushInterval) + " s")
+        self.printConfiguration("Trajectories Rotate Rows: " + str(trajectoriesRotateRows))
+        self.printConfiguration("Trajectories Rotate Interval: " + str(trajectoriesRotateInterval) + " s")
+
+        # Every run appends new parts to same trajectories directory
+        if int(trajectoriesEnabled) == 1:
+            self.trajectorySink = TrajectorySink(trajectoriesPath, int(trajectoriesFlushRows), float(trajectoriesFlushInterval), int(trajectoriesRotateRows), float(trajectoriesRotateInterval))
+
+        else:
+            self.trajectorySink = None
+
+        return self.trajectorySink
+
+    # Function: getTrackerConfiguration
+    def getTrackerConfiguration(self):
+
+        trackerEngineType = self.getConfigurationValue('Tracker', 'tracker-engine', 'parallel')
+        trackerThreads = self.getConfigurationValue('Tracker', 'tracker-threads', '0')
+        trackingScale = self.getConfigurationValue('Tracker', 'tracking-scale', '1')
+        regionPadding = self.getConfigurationValue('Tracker', 'region-padding', '1.0')
+        regionMargin = self.getConfigurationValue('Tracker', 'region-margin', '0.25')
+        frameSkip = self.getConfigurationValue('Tracker', 'frame-skip', '0')
+        frameBudget = self.getConfigurationValue('Tracker', 'frame-budget', '33')
+        maxFrameSkip = self.getConfigurationValue('Tracker', 'max-frame-skip', '4')
+
+        self.printConfiguration("Tracker Engine: " + str(trackerEngineType))
+        self.printConfiguration("Tracker Threads: " + str(trackerThreads))
+        self.printConfiguration("Tracking Scale: " + str(trackingScale))
+        self.printConfiguration("Region Padding: " + str(regionPadding))
+        self.printConfiguration("Region Margin: " + str(regionMargin))
+        self.printConfiguration("Frame Skip: " + str(frameSkip))
+        self.printConfiguration("Frame Budget: " + str(frameBudget) + " ms")
+        self.printConfiguration("Max Frame Skip: " + str(maxFrameSkip))
+
+        self.regionPadding = float(regionPadding)
+        self.regionMargin = float(regionMargin)
+
+        # Load adaptive scheduler runs tracker update every N frames
+        if int(frameSkip) == 1:
+            self.frameScheduler = FrameSkipScheduler(float(frameBudget) / 1000.0, int(maxFrameSkip))
+
+        else:
+            self.frameScheduler = None
+
+        self.trackerEngineType = str(trackerEngineType).strip().lower()
+        self.trackerThreads = int(trackerThreads)
+
+        # Tracking scale lower than 1 would upscale, track at full resolution instead
+        self.trackingScale = max(1.0, float(trackingScale))
+
+        return self.trackerEngineType, self.trackerThreads
+
+    # Function: getOutputConfiguration
+    def getOutputConfiguration(self):
+
+        displayOutput = self.getConfigurationValue('Configuration', 'display', '1')
+        logInterval = self.getConfigurationValue('Configuration', 'log-interval', '0')
+
+        self.printConfiguration("Display: " + str(displayOutput))
+        self.printConfiguration("Log Interval: " + str(logInterval))
+
+        self.displayOutput = int(displayOutput)
+        self.logRateLimiter = LogRateLimiter(float(logInterval))
+
+        return self.displayOutput, self.logRateLimiter
+
+    # Function: getDetectionConfiguration
+    def getDetectionConfiguration(self):
+
+        self.getOutputConfiguration()
+
+        detectorType = self.getConfigurationValue('Detection', 'detector-type', 'none')
+        detectorModel = self.getConfigurationValue('Detection', 'detector-model', '')
+        detectorConfig = self.getConfigurationValue('Detection', 'detector-config', '')
+        detectorInterval = self.getConfigurationValue('Detection', 'detector-interval', '30')
+        detectorConfidence = self.getConfigurationValue('Detection', 'detector-confidence', '0.5')
+        detectorMinArea = self.getConfigurationValue('Detection', 'detector-min-area', '400')
+        detectorInputSize = self.getConfigurationValue('Detection', 'detector-input-size', '300x300')
+        detectorMean = self.getConfigurationValue('Detection', 'detector-mean', '104,177,123')
+        detectorScale = self.getConfigurationValue('Detection', 'detector-scale', '1.0')
+        detectorSwapRB = self.getConfigurationValue('Detection', 'detector-swap-rb', '0')
+        detectorClasses = self.getConfigurationValue('Detection', 'detector-classes', '')
+
+        self.printConfiguration("Detector Type: " + str(detectorType))
+        self.printConfiguration("Detector Model: " + str(detectorModel))
+        self.printConfiguration("Detector Interval: " + str(detectorInterval))
+
+        self.detectorInterval = max(1, int(detectorInterval))
+
+        detectorType = str(detectorType).strip().lower()
+
+        if detectorType in TargetDetector.detectorTypes:
+            self.targetDetector = TargetDetector(detectorType, detectorModel, detectorConfig, float(detectorConfidence), int(detectorMinArea), detectorInputSize, detectorMean, detectorScale, detectorSwapRB, detectorClasses)
+
+        else:
+            self.targetDetector = None
+
+        return self.displayOutput, self.targetDetector, self.detectorInterval
+
+    # Function: getTrackStoreConfiguration
+    def getTrackStoreConfiguration(self):
+
+        associationMethod = self.getConfigurationValue('Tracks', 'track-association', 'greedy')
+        associationThreshold = self.getConfigurationValue('Tracks', 'track-iou-threshold', '0.3')
+        confirmHits = self.getConfigurationValue('Tracks', 'track-confirm-hits', '3')
+        maxMisses = self.getConfigurationValue('Tracks', 'track-max-misses', '10')
+        maxLostAge = self.getConfigurationValue('Tracks', 'track-max-lost-age', '300')
+
+        self.printConfiguration("Track Association: " + str(associationMethod))
+        self.printConfiguration("Track IoU Threshold: " + str(associationThreshold))
+        self.printConfiguration("Track Confirm Hits: " + str(confirmHits))
+        self.printConfiguration("Track Max Misses: " + str(maxMisses))
+        self.printConfiguration("Track Max Lost Age: " + str(maxLostAge))
+
+        self.trackStore = TrackStore(str(associationMethod).strip().lower(), float(associationThreshold), int(confirmHits), int(maxMisses), int(maxLostAge), self.getMotionConfiguration(), self.getReidentificationConfiguration())
+
+        return self.trackStore
+
+    # Function: getReidentificationConfiguration
+    def getReidentificationConfiguration(self):
+
+        reidEnabled = self.getConfigurationValue('Tracks', 'reid', '0')
+        reidThreshold = self.getConfigurationValue('Tracks', 'reid-threshold', '0.85')
+        reidGallerySize = self.getConfigurationValue('Tracks', 'reid-gallery-size', '500')
+        reidMaxAge = self.getConfigurationValue('Tracks', 'reid-max-age', '600')
+        reidUpdateInterval = self.getConfigurationValue('Tracks', 'reid-update-interval', '10')
+
+        self.printConfiguration("Re-identification: " + str(reidEnabled))
+        self.printConfiguration("Re-identification Threshold: " + str(reidThreshold))
+        self.printConfiguration("Re-identification Gallery Size: " + str(reidGallerySize))
+        self.printConfiguration("Re-identification Max Age: " + str(reidMaxAge))
+        self.printConfiguration("Re-identification Update Interval: " + str(reidUpdateInterval))
+
+        self.galleryUpdateInterval = max(1, int(reidUpdateInterval))
+
+        # Appearance gallery of every confirmed target
+        if int(reidEnabled) == 1:
+            appearanceGallery = AppearanceGallery(int(reidGallerySize), float(reidMaxAge), float(reidThreshold))
+
+        else:
+            appearanceGallery = None
+
+        return appearanceGallery
+
+    # Function: getMotionConfiguration
+    def getMotionConfiguration(self):
+
+        motionModel = self.getConfigurationValue('Motion', 'motion-model', 'none')
+        processNoise = self.getConfigurationValue('Motion', 'motion-process-noise', '0.05')
+        measurementNoise = self.getConfigurationValue('Motion', 'motion-measurement-noise', '0.05')
+
+        self.printConfiguration("Motion Model: " + str(motionModel))
+        self.printConfiguration("Motion Process Noise: " + str(processNoise))
+        self.printConfiguration("Motion Measurement Noise: " + str(measurementNoise))
+
+        motionModel = str(motionModel).strip().lower()
+
+        # Kalman filter bank for every track
+        if motionModel in KalmanFilterBank.motionModels:
+            kalmanFilterBank = KalmanFilterBank(motionModel, float(processNoise), float(measurementNoise))
+
+        else:
+            kalmanFilterBank = None
+
+        return kalmanFilterBank
+
+    # Function: getStatisticsConfiguration
+    def getStatisticsConfiguration(self):
+
+        statisticsEnabled = self.getConfigurationValue('Statistics', 'statistics', '0')
+        statisticsWindow = self.getConfigurationValue('Statistics', 'statistics-window', '300')
+        statisticsInterval = self.getConfigurationValue('Statistics', 'statistics-interval', '5')
+        statisticsFile = self.getConfigurationValue('Statistics', 'statistics-file', '')
+        statisticsPort = self.getConfigurationValue('Statistics', 'statistics-port', '0')
+
+        self.printConfiguration("Statistics: " + str(statisticsEnabled))
+        self.printConfiguration("Statistics Window: " + str(statisticsWindow))
+        self.printConfiguration("Statistics Interval: " + str(statisticsInterval))
+        self.printConfiguration("Statistics File: " + str(statisticsFile))
+        self.printConfiguration("Statistics Port: " + str(statisticsPort))
+
+        # YARP statistics port is opened once YARP network is ready
+        self.performanceMonitor = PerformanceMonitor(int(statisticsEnabled), int(statisticsWindow), float(statisticsInterval), str(statisticsFile).strip(), "null")
+
+        return int(statisticsEnabled), int(statisticsPort)
+
+    # Function: getStreamsConfiguration
+    def getStreamsConfiguration(self):
+
+        streamSources = self.getConfigurationValue('Streams', 'stream-sources', '')
+        streamNames = self.getConfigurationValue('Streams', 'stream-names', '')
+        streamSeeds = self.getConfigurationValue('Streams', 'stream-seeds', '')
+        streamFPS = self.getConfigurationValue('Streams', 'stream-fps', '30')
+        streamWorkers = self.getConfigurationValue('Streams', 'stream-workers', '0')
+
+        # Comma separated lists, one item per stream
+        streamSources = [streamSource.strip() for streamSource in str(streamSources).split(",") if streamSource.strip() != ""]
+        streamNames = [streamName.strip() for streamName in str(streamNames).split(",") if streamName.strip() != ""]
+        streamSeeds = [streamSeed.strip() for streamSeed in str(streamSeeds).split(",")]
+        streamFPS = [float(fps) for fps in str(streamFPS).split(",") if fps.strip() != ""]
+
+        # Default stream names: stream0, stream1, ...
+        while len(streamNames) < len(streamSources):
+            streamNames.append("stream" + str(len(streamNames)))
+
+        while len(streamSeeds) < len(streamSources):
+            streamSeeds.append("")
+
+        while len(streamFPS) < len(streamSources):
+            streamFPS.append(streamFPS[-1] if len(streamFPS) > 0 else 30.0)
+
+        self.printConfiguration("Stream Sources: " + str(streamSources))
+        self.printConfiguration("Stream Names: " + str(streamNames))
+        self.printConfiguration("Stream FPS: " + str(streamFPS))
+        self.printConfiguration("Stream Workers: " + str(streamWorkers))
+
+        return streamSources, streamNames, streamSeeds, streamFPS, int(streamWorkers)
+
+    # Function: checkYARPInstalled
+    def checkYARPInstalled(self):
+
+        # Imported only when YARP mode is enabled
+        global yarp
+
+        try:
+            import yarp
+            yarpInstalled = 1
+
+        except:
+            systemResponseMessage = "\n[ERROR] Sorry, YARP middleware not installed. Using not YARP mode.\n"
+            self.systemResponse.text_color = "red"
+            self.systemResponse.fail(systemResponseMessage)
+
+            yarpInstalled = 0
+
+        return yarpInstalled
+
+    # Function: getObjectTracker
+    def getObjectTracker(self):
+
+        # OpenCV MultiTracker updates every target serially
+        if self.trackerEngineType == "multitracker":
+            objectTracker = cv2.MultiTracker_create()
+
+        # Parallel engine updates every target in shared thread pool
+        else:
+            if self.trackerPool is None:
+
+                # Use one thread per core by default
+                trackerThreads = self.trackerThreads
+
+                if int(trackerThreads) <= 0:
+                    trackerThreads = os.cpu_count() or 1
+
+                self.trackerPool = concurrent.futures.ThreadPoolExecutor(max_workers=int(trackerThreads))
+
+            # Track inside search windows around targets
+            if self.trackerEngineType == "region":
+                objectTracker = RegionTrackerEngine(self.trackerPool, self.regionPadding, self.regionMargin)
+
+            else:
+                objectTracker = ParallelTrackerEngine(self.trackerPool)
+
+        return objectTracker
+
+    # Function: getCascadePolicy
+    def getCascadePolicy(self, targetID):
+
+        # Per-target section [Cascade-ID] overrides default [Cascade] section
+        cascadePolicy = []
+
+        for cascadeKey, defaultValue in [('cascade-fast-tracker', 'MOSSE'), ('cascade-accurate-tracker', 'CSRT'), ('cascade-interval', '10'), ('cascade-min-confidence', '0.5'), ('cascade-max-jump', '0.5')]:
+            cascadeValue = self.getConfigurationValue('Cascade', cascadeKey, defaultValue)
+
+            if targetID is not None:
+                cascadeValue = self.getConfigurationValue('Cascade-' + str(int(targetID)), cascadeKey, cascadeValue)
+
+            cascadePolicy.append(cascadeValue)
+
+        fastTrackerType, accurateTrackerType, anchorInterval, minConfidence, maxJump = cascadePolicy
+
+        # Cascade trackers can not be nested
+        fastTrackerType = str(fastTrackerType).strip().upper()
+        accurateTrackerType = str(accurateTrackerType).strip().upper()
+
+        if fastTrackerType == self.objectTrackerTypes[8]:
+            fastTrackerType = self.objectTrackerTypes[6]
+
+        if accurateTrackerType == self.objectTrackerTypes[8]:
+            accurateTrackerType = self.objectTrackerTypes[7]
+
+        return fastTrackerType, accurateTrackerType, int(anchorInterval), float(minConfidence), float(maxJump)
+
+    # Function: getTracker
+    def getTracker(self, trackerType, targetID=None):
+
+        if trackerType == self.objectTrackerTypes[0]:
+            tracker = cv2.TrackerBoosting_create()
+
+        elif trackerType == self.objectTrackerTypes[1]:
+            tracker = cv2.TrackerMIL_create()
+
+        elif trackerType == self.objectTrackerTypes[2]:
+            tracker = cv2.TrackerKCF_create()
+
+        elif trackerType == self.objectTrackerTypes[3]:
+            tracker = cv2.TrackerTLD_create()
+
+        elif trackerType == self.objectTrackerTypes[4]:
+            tracker = cv2.TrackerMedianFlow_create()
+
+        elif trackerType == self.objectTrackerTypes[5]:
+            tracker = cv2.TrackerGOTURN_create()
+
+        elif trackerType == self.objectTrackerTypes[6]:
+            tracker = cv2.TrackerMOSSE_create()
+
+        elif trackerType == self.objectTrackerTypes[7]:
+            tracker = cv2.TrackerCSRT_create()
+
+        elif trackerType == self.objectTrackerTypes[8]:
+            fastTrackerType, accurateTrackerType, anchorInterval, minConfidence, maxJump = self.getCascadePolicy(targetID)
+            tracker = CascadeTracker(self.getTracker, fastTrackerType, accurateTrackerType, anchorInterval, minConfidence, maxJump)
+
+        else:
+            tracker = cv2.TrackerCSRT_create()
+
+        return tracker
+
+    # Function: systemInfo
+    def systemInfo(self):
+
+        print("\n**************************************************************************")
+        print("User controller:")
+        print("**************************************************************************\n")
+        print("1. Select region of interest with mouse.")
+        print("2. Press enter to save region of interest to be tracked.")
+        print("3. Press q to ends region selection or press c to continue selecting more regions.")
+        print("4. Press u with program is working to update or re-select region of interest.")
+
+    # Function: initializeCaptureDevices
+    def initializaCaptureDevices(self, videoSource, replayPath=None, replayRealtime=0):
+
+        # Recorded frames replace live capture device
+        if replayPath is not None:
+            return RecordingReplaySource(replayPath, replayRealtime)
+
+        # If read from local webcam
+        if str(videoSource) == "0":
+            captureDevice = cv2.VideoCapture(0)
+
+        # If video file or IP camera
+        else:
+            captureDevice = cv2.VideoCapture(str(videoSource))
+
+        # Variable to to prevent dark frame at staring webcam
+        loopControlGetFirstFrame = 0
+
+        while int(loopControlGetFirstFrame) < 5:
+            success, dataToSolve = captureDevice.read()
+
+            # Increase loopControlGetFirstFrame
+            loopControlGetFirstFrame = loopControlGetFirstFrame + 1
+
+        systemResponseMessage = "\n[INFO] Capture device " + str(videoSource) + " ready.\n"
+        self.systemResponse.text_color = "blue"
+        self.systemResponse.info(systemResponseMessage)
+
+        return captureDevice
+
+    # Function: startCaptureDevices
+    def startCaptureDevices(self, videoSource, replayPath=None, replayRealtime=0):
+
+        # Open and warm up capture device while stages are configured
+        captureStartup = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        captureDevice = captureStartup.submit(self.initializaCaptureDevices, videoSource, replayPath, replayRealtime)
+        captureStartup.shutdown(wait=False)
+
+        return captureDevice
+
+    # Function: waitCaptureDevices
+    def waitCaptureDevices(self, inputImagePort):
+
+        # YARP ports are ready once opened
+        if isinstance(inputImagePort, concurrent.futures.Future):
+            inputImagePort = inputImagePort.result()
+
+        return inputImagePort
+
+    # Function: getDataToSolve
+    def getDataToSolve(self, yarpReceive, inputImagePort, imageWidth, imageHeight):
+
+        stageStart = self.performanceMonitor.start()
+
+        # Receive from selected source
+        if int(yarpReceive) == 1:
+            dataToSolve = inputImagePort.receive()
+
+        # If not YARP mode
+        else:
+            success, dataToSolve = inputImagePort.read()
+
+        stageStart = self.performanceMonitor.stop('capture', stageStart)
+
+        # Record frames exactly as received, before resize
+        if self.frameRecorder is not None:
+            self.frameRecorder.record(dataToSolve, time.time())
+
+        # Resize data to solved only if size does not match
+        if dataToSolve.shape[1] != imageWidth or dataToSolve.shape[0] != imageHeight:
+            dataToSolve = cv2.resize(dataToSolve, (imageWidth, imageHeight))
+
+        self.performanceMonitor.stop('resize', stageStart)
+
+        return dataToSolve
+
+    # Function: getTrackingFrame
+    def getTrackingFrame(self, dataToSolve):
+
+        # Track at full resolution
+        if self.trackingScale <= 1.0:
+            return dataToSolve
+
+        # Track on downscaled pyramid level
+        trackingWidth = max(1, int(round(dataToSolve.shape[1] / self.trackingScale)))
+        trackingHeight = max(1, int(round(dataToSolve.shape[0] / self.trackingScale)))
+
+        trackingFrame = cv2.resize(dataToSolve, (trackingWidth, trackingHeight), interpolation=cv2.INTER_AREA)
+
+        return trackingFrame
+
+    # Function: scaleBoxes
+    def scaleBoxes(self, boxes, scaleFactor):
+
+        # Map boxes between full resolution and tracking resolution
+        scaledBoxes = np.array(boxes, dtype=np.float64).reshape(-1, 4) * float(scaleFactor)
+
+        return scaledBoxes
+
+    # Function: getDetectedTargets
+    def getDetectedTargets(self, dataToSolve):
+
+        # Detect on tracking frame and map boxes to full resolution
+        trackingFrame = self.getTrackingFrame(dataToSolve)
+        boxes = self.scaleBoxes(self.targetDetector.detect(trackingFrame), self.trackingScale)
+
+        # Select random color to tracker object
+        colors = [(randint(0, 255), randint(0, 255), randint(0, 255)) for box in boxes]
+
+        if len(boxes) > 0:
+            systemResponseMessage = "\n[INFO] " + str(len(boxes)) + " targets detected correctly.\n"
+            self.systemResponse.text_color = "blue"
+            self.systemResponse.info(systemResponseMessage)
+
+        return boxes, colors
+
+    # Function: getTargetsSuccess
+    def getTargetsSuccess(self, trackerEngine, success, boxes):
+
+        # Parallel engine reports success per target
+        if isinstance(trackerEngine, ParallelTrackerEngine):
+            targetsSuccess = np.array(trackerEngine.getStatistics()[1], dtype=bool)
+
+        # MultiTracker only reports global success
+        else:
+            targetsSuccess = np.full(len(boxes), bool(success))
+
+        return targetsSuccess
+
+    # Function: buildTrackerEngine
+    def buildTrackerEngine(self, trackerType, dataToSolve):
+
+        # One tracker per active track, in track store order
+        trackerEngine = self.addTargets(self.getObjectTracker(), trackerType, self.getTrackingFrame(dataToSolve), self.scaleBoxes(self.trackStore.getTrackerBoxes(), 1.0 / self.trackingScale), self.trackStore.getTrackerIDs())
+
+        return trackerEngine
+
+    # Function: syncTrackerEngine
+    def syncTrackerEngine(self, trackerType, trackerEngine, dataToSolve, reanchoredIDs):
+
+        # MultiTracker can not remove targets, targets without IDs can not be matched
+        if not isinstance(trackerEngine, ParallelTrackerEngine) or None in trackerEngine.targetIDs:
+            return self.buildTrackerEngine(trackerType, dataToSolve)
+
+        trackerIDs = self.trackStore.getTrackerIDs()
+
+        # Lost and deleted targets drop their trackers, re-anchored targets start again on their new boxes
+        keptIDs = np.setdiff1d(trackerIDs, reanchoredIDs)
+        trackerEngine.removeTargets([targetID for targetID in trackerEngine.targetIDs if targetID not in keptIDs])
+
+        # Surviving targets keep their learned models, new and re-acquired targets get new trackers
+        newTargets = ~np.isin(trackerIDs, trackerEngine.targetIDs)
+        self.addTargets(trackerEngine, trackerType, self.getTrackingFrame(dataToSolve), self.scaleBoxes(self.trackStore.getTrackerBoxes()[newTargets], 1.0 / self.trackingScale), trackerIDs[newTargets])
+
+        # Tracker outputs follow track store order
+        trackerEngine.sortTargets(trackerIDs)
+
+        return trackerEngine
+
+    # Function: updateTargets
+    def updateTargets(self, trackerType, trackerEngine, dataToSolve, frameIndex, frameStep=1, skippedFrames=0):
+
+        # Region engine anticipates target motion since its last update when placing search windows
+        if isinstance(trackerEngine, RegionTrackerEngine) and self.trackStore.kalmanFilterBank is not None:
+            trackerEngine.targetVelocities = self.trackStore.getTrackerVelocities() * (frameStep + skippedFrames) / self.trackingScale
+
+        # Update tracker engine with new boxes position
+        success, boxes = trackerEngine.update(self.getTrackingFrame(dataToSolve))
+
+        # Map boxes back to full resolution
+        boxes = self.scaleBoxes(boxes, self.trackingScale)
+
+        # Update track lifecycles, missed targets follow motion model prediction
+        targetsSuccess = self.getTargetsSuccess(trackerEngine, success, boxes)
+        rebuildTrackerEngine = self.trackStore.updateTracked(boxes, targetsSuccess, frameStep, skippedFrames)
+        reanchoredIDs = np.zeros(0, dtype=np.int64)
+
+        # Refresh appearance of tracked targets for re-identification
+        if self.trackStore.appearanceGallery is not None and frameIndex % self.galleryUpdateInterval == 0:
+            self.trackStore.updateAppearance(dataToSolve)
+
+        # Re-acquire lost targets and look for new ones every detector interval
+        if self.targetDetector is not None:
+
+            if not targetsSuccess.all() or (frameIndex + 1) % self.detectorInterval == 0:
+                detectedBoxes, detectedColors = self.getDetectedTargets(dataToSolve)
+                rebuildTrackerEngine = self.trackStore.updateDetections(detectedBoxes, detectedColors, 0, 0, dataToSolve) or rebuildTrackerEngine
+                reanchoredIDs = self.trackStore.reanchoredIDs
+
+        # Add and remove trackers when active tracks changed
+        if rebuildTrackerEngine:
+            trackerEngine = self.syncTrackerEngine(trackerType, trackerEngine, dataToSolve, reanchoredIDs)
+
+        return trackerEngine
+
+    # Function: getTargets
+    def getTargets(self, dataToSolve):
+
+        # Build boxes and colors arrays
+        boxes = []
+        colors = []
+
+        loopControlTargetSelection = 0
+
+        while int(loopControlTargetSelection) == 0:
+
+            # Call to interactive GUI selectROI to select the target box
+            box = cv2.selectROI('[PROCESSED] multipleObjectTracker2D', dataToSolve)
+
+            # Add region of interest to boxes
+            boxes.append(box)
+
+            # Select random color to tracker object
+            colors.append((randint(0, 255), randint(0, 255), randint(0, 255)))
+
+            systemResponseMessage = "\n[INFO] Target selected correctly.\n"
+            self.systemResponse.text_color = "blue"
+            self.systemResponse.info(systemResponseMessage)
+
+            systemResponseMessage = "\n[INFO] Enter q to ends selection. Enter c to select an additional target.\n"
+            self.systemResponse.text_color = "red"
+            self.systemResponse.fail(systemResponseMessage)
+
+            # If q is pressed exit selection
+            k = cv2.waitKey(0) & 0xFF
+
+            if (k == 113):
+                loopControlTargetSelection = 1
+
+                systemResponseMessage = "\n[INFO] Target selection done correctly.\n"
+                self.systemResponse.text_color = "green"
+                self.systemResponse.succeed(systemResponseMessage)
+
+        return boxes, colors
+
+    # Function: addTargets
+    def addTargets(self, objectTracker, trackerType, dataToSolve, boxes, targetIDs=None):
+
+        # Integer boxes are accepted by every OpenCV version
+        for targetIndex, box in enumerate(boxes):
+
+            if targetIDs is not None:
+                targetID = targetIDs[targetIndex]
+
+            else:
+                targetID = None
+
+            tracker = self.getTracker(trackerType, targetID)
+
+            # Region engine re-initializes trackers when search windows move
+            if isinstance(objectTracker, RegionTrackerEngine):
+                objectTracker.add(tracker, dataToSolve, tuple(int(round(float(value))) for value in box), lambda trackerType=trackerType, targetID=targetID: self.getTracker(trackerType, targetID), targetID)
+
+            elif isinstance(objectTracker, ParallelTrackerEngine):
+                objectTracker.add(tracker, dataToSolve, tuple(int(round(float(value))) for value in box), targetID)
+
+            else:
+                objectTracker.add(tracker, dataToSolve, tuple(int(round(float(value))) for value in box))
+
+        return objectTracker
+
+    # Function: drawBoxes
+    def drawBoxes(self, boxes, colors, dataToSolve, yarpSend, outputDataPort, targetIDs=None, renderOverlay=1):
+
+        # Prepare target IDs, persistent track IDs if available
+        if targetIDs is not None:
+            targetIDs = ["TARGET: " + str(int(targetID)) for targetID in targetIDs]
+
+        else:
+            targetIDs = ["TARGET: " + str(int(colorIndex + 1)) for colorIndex in range(0, len(boxes))]
+
+        # Draw boxes and names only if frame is displayed or published
+        if int(renderOverlay) == 1:
+            self.overlayRenderer.render(dataToSolve, boxes, colors, targetIDs)
+
+        sendResults = int(yarpSend) == 1 and str(outputDataPort) != "null" and self.dataFormat == "string"
+        logResults = self.logRateLimiter.shouldLog('results')
+
+        if not sendResults and not logResults:
+            return dataToSolve
+
+        # Get coordinates
+        dataSolvedResults = [str(targetID) + self.getCoordinates(box) for targetID, box in zip(targetIDs, boxes)]
+
+        if sendResults:
+
+            # Send output, one string per target
+            outputDataPort.sendResults(dataSolvedResults)
+
+        if logResults:
+
+            # One message per target, or one periodic summary
+            if self.logRateLimiter.logInterval <= 0:
+                for dataSolvedResult in dataSolvedResults:
+                    systemResponseMessage = "\n[INFO] Results: " + str(dataSolvedResult) + ".\n"
+                    self.systemResponse.text_color = "green"
+                    self.systemResponse.succeed(systemResponseMessage)
+
+            else:
+                systemResponseMessage = "\n[INFO] Results: " + str(len(dataSolvedResults)) + " targets at frame " + str(self.processedFrames) + ". " + self.logRateLimiter.getSummary(dataSolvedResults) + "\n"
+                self.systemResponse.text_color = "green"
+                self.systemResponse.succeed(systemResponseMessage)
+
+        return dataToSolve
+
+    # Function: getCoordinates
+    def getCoordinates(self, box):
+
+        # Get centroid coordinates X and Y
+        x = int(box[0]) + int(box[2] / 2)
+        y = int(box[1]) + int(box[3] / 2)
+
+        coordinatesXY = " X: " + str(x) + ", Y: " + str(y)
+
+        return coordinatesXY
+
+    # Function: getCaptureStatistics
+    def getCaptureStatistics(self, inputImagePort):
+
+        # Only threaded capture stage reports counters
+        if isinstance(inputImagePort, FrameCaptureStage):
+            capturedFrames, droppedFrames, queueDepth = inputImagePort.getStatistics()
+
+            systemResponseMessage = "\n[INFO] Capture: " + str(capturedFrames) + " frames captured, " + str(droppedFrames) + " frames dropped, queue depth " + str(queueDepth) + ".\n"
+            self.systemResponse.text_color = "blue"
+            self.systemResponse.info(systemResponseMessage)
+
+    # Function: getTrackerStatistics
+    def getTrackerStatistics(self, trackerEngine):
+
+        # Only parallel tracker engine reports per-target counters
+        if isinstance(trackerEngine, ParallelTrackerEngine):
+            updateTimes, updateSuccess = trackerEngine.getStatistics()
+
+            for targetIndex in range(0, len(updateTimes)):
+                systemResponseMessage = "\n[INFO] Tracker: TARGET: " + str(targetIndex + 1) + " update " + str(round(updateTimes[targetIndex] * 1000, 2)) + " ms, success " + str(updateSuccess[targetIndex]) + ".\n"
+                self.systemResponse.text_color = "blue"
+                self.systemResponse.info(systemResponseMessage)
+
+    # Function: processFrame
+    def processFrame(self, trackerType, imageWidth, imageHeight, yarpSend, yarpReceive, outputImagePort, outputDataPort, inputImagePort):
+
+        frameStart = time.perf_counter()
+        trackTime = None
+        displayTime = 0.0
+
+        dataToSolve = self.getDataToSolve(yarpReceive, inputImagePort, imageWidth, imageHeight)
+
+        # Background model learns from every frame
+        if self.targetDetector is not None:
+            self.targetDetector.learn(self.getTrackingFrame(dataToSolve))
+
+        # Warm start from last snapshot once, before any target selection
+        if self.trackSnapshot is not None and self.trackSnapshot.restorePending == 1:
+            self.trackSnapshot.restorePending = 0
+            self.restoreSnapshot(trackerType, imageWidth, imageHeight)
+
+        # Recorded selections are applied at their frame, as when the operator re-selected live
+        replaySelection = None
+
+        if isinstance(inputImagePort, RecordingReplaySource):
+            replaySelection = inputImagePort.getSelection()
+
+            if replaySelection is not None:
+                self.checkTargets = 0
+
+        if int(self.checkTargets) == 0:
+
+            # Set targets from seeds file once
+            if self.seedBoxes is not None:
+                self.trackStore.updateDetections(self.seedBoxes, None, 1, 1)
+                self.seedBoxes = None
+
+            # Set targets from detector, new tracks must be confirmed by tracking
+            elif self.targetDetector is not None:
+                boxes, colors = self.getDetectedTargets(dataToSolve)
+                self.trackStore.updateDetections(boxes, colors, 0, 0, dataToSolve)
+
+            # Set targets from recorded selection when replaying, no targets until next selection otherwise
+            elif isinstance(inputImagePort, RecordingReplaySource):
+                if replaySelection is not None:
+                    boxes, colors = replaySelection
+                    self.trackStore.updateDetections(boxes, colors, 1, 1, dataToSolve)
+
+            # Headless, every target lost: seed again, lost targets near their seeds keep their IDs
+            elif int(self.selectTargets) == 0:
+                if self.reseedBoxes is not None:
+                    self.trackStore.updateDetections(self.reseedBoxes, None, 1, 1)
+
+            # Set targets from interactive selection, matched or recognized selections keep their IDs
+            else:
+                boxes, colors = self.getTargets(dataToSolve)
+                self.trackStore.updateDetections(boxes, colors, 1, 1, dataToSolve)
+
+                if self.frameRecorder is not None:
+                    self.frameRecorder.recordSelection(boxes, colors)
+
+            # Add targets to tracking system
+            if self.trackStore.getActive().any():
+                self.trackerEngine = self.buildTrackerEngine(trackerType, dataToSolve)
+                self.rebuildTrackerEngine = 0
+                self.checkTargets = 1
+
+            # First frame send base to solve frame
+            dataSolved = dataToSolve
+
+        else:
+            # Reloaded tracker configuration, trackers start again from current tracks
+            if int(self.rebuildTrackerEngine) == 1:
+                self.trackerEngine = self.buildTrackerEngine(trackerType, dataToSolve)
+                self.rebuildTrackerEngine = 0
+
+            stageStart = self.performanceMonitor.start()
+
+            # Dropped frames since last update are predicted through
+            frameStep = 1
+
+            if isinstance(inputImagePort, FrameCaptureStage):
+                droppedFrames = inputImagePort.getStatistics()[1]
+                frameStep = 1 + max(0, droppedFrames - self.droppedFrames)
+                self.droppedFrames = droppedFrames
+
+            # Skipped frames extrapolate boxes, tracker sees every frame step since its last update
+            if self.frameScheduler is not None and not self.frameScheduler.shouldTrack():
+                self.trackStore.predictTracked(frameStep)
+                self.skippedFrames = self.skippedFrames + frameStep
+
+                stageStart = self.performanceMonitor.stop('predict', stageStart)
+
+            else:
+                trackStart = time.perf_counter()
+
+                # Update tracker engine and track store with new boxes position
+                self.trackerEngine = self.updateTargets(trackerType, self.trackerEngine, dataToSolve, self.processedFrames, frameStep, self.skippedFrames)
+                self.skippedFrames = 0
+
+                trackTime = time.perf_counter() - trackStart
+
+                # Every target lost, select or detect again
+                if not self.trackStore.getActive().any():
+                    self.checkTargets = 0
+
+                # Periodic snapshot on tracked frames, before overlays are drawn
+                if self.trackSnapshot is not None and self.trackSnapshot.isDue():
+                    self.trackSnapshot.save(self.trackStore.getState(), dataToSolve)
+
+                stageStart = self.performanceMonitor.stop('track', stageStart)
+
+            # Draw confirmed tracks, overlays only if someone views or receives the frame
+            renderOverlay = int(self.displayOutput) == 1 or (int(yarpSend) == 1 and str(outputImagePort) != "null")
+
+            boxes, colors, targetIDs = self.trackStore.getConfirmedTracks()
+            dataSolved = self.drawBoxes(boxes, colors, dataToSolve, yarpSend, outputDataPort, targetIDs, renderOverlay)
+
+            # Confirmed tracks buffered for trajectory analytics
+            if self.trajectorySink is not None:
+                self.trajectorySink.record(self.processedFrames, time.time(), targetIDs, boxes)
+
+            # Replayed tracks on disk to compare runs
+            if self.tracksOutput is not None:
+                self.writeTracks(self.tracksOutput, self.processedFrames, inputImagePort.getTimestamp() * 1000.0, boxes, targetIDs)
+
+            stageStart = self.performanceMonitor.stop('draw', stageStart)
+
+            # Send every target in one structured message
+            if int(yarpSend) == 1 and str(outputDataPort) != "null" and self.dataFormat == "bottle":
+                outputDataPort.sendTracks(self.processedFrames, time.time(), targetIDs, boxes, self.trackStore.getConfirmedConfidences(), self.trackStore.getConfirmedVelocities())
+                self.performanceMonitor.stop('publish-data', stageStart)
+
+        if int(self.displayOutput) == 1:
+            stageStart = self.performanceMonitor.start()
+
+            # Display data solved tracking
+            cv2.imshow('[PROCESSED] multipleObjectTracker2D', dataSolved)
+
+            displayStart = time.perf_counter()
+
+            # Replay is paced by its source, selections come from recording
+            if isinstance(inputImagePort, RecordingReplaySource):
+                pressedKey = cv2.waitKey(1)
+
+            else:
+                pressedKey = cv2.waitKey(33)
+
+            # If key u is pressed re-select targets
+            if pressedKey == ord('u') and not isinstance(inputImagePort, RecordingReplaySource):
+                self.checkTargets = 0
+
+            # If key q is pressed stop processing
+            elif pressedKey == ord('q'):
+                self.stopRequests = 1
+
+            displayTime = time.perf_counter() - displayStart
+
+            self.performanceMonitor.stop('display', stageStart)
+
+        if int(yarpSend) == 1 and str(outputImagePort) != "null":
+            stageStart = self.performanceMonitor.start()
+
+            # Send output
+            outputImagePort.send(dataSolved)
+
+            self.performanceMonitor.stop('publish-image', stageStart)
+
+        # Adapt frame skip to load, display key wait is not processing time
+        if self.frameScheduler is not None:
+            self.frameScheduler.recordFrame(time.perf_counter() - frameStart - displayTime, trackTime)
+            self.performanceMonitor.setMetric('skip-ratio', round(self.frameScheduler.getSkipRatio(), 3))
+            self.performanceMonitor.setMetric('frame-skip', self.frameScheduler.frameSkip)
+
+        # Count frame and report statistics when due
+        self.performanceMonitor.frame()
+
+        # Report capture counters every 100 frames
+        self.processedFrames = self.processedFrames + 1
+
+        if self.processedFrames % 100 == 0:
+            self.getCaptureStatistics(inputImagePort)
+
+            if int(self.checkTargets) == 1:
+                self.getTrackerStatistics(self.trackerEngine)
+
+    # Function: processRequest
+    def processRequests(self, trackerType, imageWidth, imageHeight, yarpSend, yarpReceive, outputImagePort, outputDataPort, inputImagePort):
+
+        # Variable to control loopProcessRequests
+        loopProcessRequests = 0
+
+        # Ctrl+C stops processing too, caller closes recordings, snapshots and trajectories
+        try:
+            while int(loopProcessRequests) == 0:
+
+                # Waiting to input data request, rate limited
+                if self.logRateLimiter.shouldLog('requests'):
+                    print("**************************************************************************")
+                    print("Waiting for input data request:")
+                    print("**************************************************************************")
+
+                    systemResponseMessage = "\n[INFO] Waiting for input data request at " + str(datetime.datetime.now()) + " ...\n"
+                    self.systemResponse.text_color = "yellow"
+                    self.systemResponse.warn(systemResponseMessage)
+
+                    print("\n**************************************************************************")
+                    print("Processing:")
+                    print("**************************************************************************\n")
+
+                # Replay ends with recorded frames, key q stops processing
+                if int(self.stopRequests) == 1 or (isinstance(inputImagePort, RecordingReplaySource) and not inputImagePort.hasFrames()):
+                    loopProcessRequests = 1
+                    continue
+
+                try:
+                    # Apply config.ini changes between frames, capture device and ports are kept
+                    if self.configurationWatcher is not None and self.configurationWatcher.hasChanged():
+                        trackerType, imageWidth, imageHeight = self.reloadConfiguration(trackerType, imageWidth, imageHeight)
+
+                    self.processFrame(trackerType, imageWidth, imageHeight, yarpSend, yarpReceive, outputImagePort, outputDataPort, inputImagePort)
+
+                except Exception:
+                    systemResponseMessage = "\n[ERROR] Sorry, i couldn´t resolve your request.\n"
+                    self.systemResponse.text_color = "red"
+                    self.systemResponse.fail(systemResponseMessage)
+
+        except KeyboardInterrupt:
+            systemResponseMessage = "\n[INFO] Stopping requests ...\n"
+            self.systemResponse.text_color = "yellow"
+            self.systemResponse.warn(systemResponseMessage)
+
+    # Function: processReplayRequests
+    def processReplayRequests(self, trackerType, imageWidth, imageHeight, yarpSend, outputImagePort, outputDataPort, replaySource, outputFile):
+
+        print("\n**************************************************************************")
+        print("Replay:")
+        print("**************************************************************************\n")
+
+        outputDirectory = os.path.dirname(os.path.abspath(outputFile))
+
+        if not os.path.isdir(outputDirectory):
+            os.makedirs(outputDirectory)
+
+        with open(outputFile, 'w') as tracksData:
+            tracksData.write("frame,timestamp,id,x,y,width,height\n")
+            self.tracksOutput = tracksData
+
+            replayStart = time.perf_counter()
+
+            self.processRequests(trackerType, imageWidth, imageHeight, yarpSend, 0, outputImagePort, outputDataPort, replaySource)
+
+            replayTime = time.perf_counter() - replayStart
+            self.tracksOutput = None
+
+        systemResponseMessage = "\n[INFO] Replay done: " + str(self.processedFrames) + " frames in " + str(round(replayTime, 2)) + " s, " + str(round(self.processedFrames / max(replayTime, 1e-9), 2)) + " fps. Tracks saved in " + str(outputFile) + ".\n"
+        self.systemResponse.text_color = "green"
+        self.systemResponse.succeed(systemResponseMessage)
+
+    # Function: getQueryTime
+    def getQueryTime(self, queryTime):
+
+        if queryTime is None:
+            return None
+
+        # Epoch seconds or ISO date and time
+        try:
+            return float(queryTime)
+
+        except:
+            return datetime.datetime.fromisoformat(str(queryTime)).timestamp()
+
+    # Function: processTrajectoryRequest
+    def processTrajectoryRequest(self, trajectoriesPath, targetID, startTime, endTime, runName, outputFile):
+
+        print("\n**************************************************************************")
+        print("Trajectory:")
+        print("**************************************************************************\n")
+
+        trajectoryReader = TrajectoryReader(trajectoriesPath)
+        startTime = self.getQueryTime(startTime)
+        endTime = self.getQueryTime(endTime)
+
+        # Track IDs are only unique within a run, a query must not join runs
+        trajectoryRuns = trajectoryReader.getRuns(startTime, endTime)
+
+        if runName is None and len(trajectoryRuns) > 1:
+            systemResponseMessage = "\n[ERROR] Sorry, time range spans " + str(len(trajectoryRuns)) + " runs, select one with --trajectory-run:\n"
+
+            for trajectoryRun, runTimes in sorted(trajectoryRuns.items()):
+                systemResponseMessage = systemResponseMessage + str(trajectoryRun) + ": " + str(datetime.datetime.fromtimestamp(runTimes[0])) + " to " + str(datetime.datetime.fromtimestamp(runTimes[1])) + "\n"
+
+            self.systemResponse.text_color = "red"
+            self.systemResponse.fail(systemResponseMessage)
+            return
+
+        timestamps, frames, boxes = trajectoryReader.getTrajectory(int(targetID), startTime, endTime, runName)
+
+        outputDirectory = os.path.dirname(os.path.abspath(outputFile))
+
+        if not os.path.isdir(outputDirectory):
+            os.makedirs(outputDirectory)
+
+        with open(outputFile, 'w') as trajectoryData:
+            trajectoryData.write("timestamp,frame,x,y,width,height\n")
+
+            for timestamp, frameIndex, box in zip(timestamps, frames, boxes):
+                trajectoryData.write(str(round(float(timestamp), 3)) + "," + str(int(frameIndex)) + "," + ",".join(str(round(float(value), 2)) for value in box) + "\n")
+
+        systemResponseMessage = "\n[INFO] Trajectory of target " + str(targetID) + ": " + str(len(timestamps)) + " boxes saved in " + str(outputFile) + ".\n"
+        self.systemResponse.text_color = "green"
+        self.systemResponse.succeed(systemResponseMessage)
+
+    # Function: processStreamRequests
+    def processStreamRequests(self, trackerType, imageWidth, imageHeight, yarpSend, yarpReceive):
+
+        streamSources, streamNames, streamSeeds, streamFPS, streamWorkers = self.getStreamsConfiguration()
+
+        # One worker per core by default
+        if int(streamWorkers) <= 0:
+            streamWorkers = os.cpu_count() or 1
+
+        # Tracker pool shared by every stream, separate from stream pool to avoid nested waits
+        self.getObjectTracker()
+
+        trackingStreams = []
+
+        for streamSource, streamName, streamSeed, fps in zip(streamSources, streamNames, streamSeeds, streamFPS):
+
+            # Streams that can not select targets are skipped, others keep running
+            try:
+                trackingStreams.append(TrackingStream(self, streamName, streamSource, streamSeed, fps, trackerType, imageWidth, imageHeight, yarpSend, yarpReceive))
+
+            except ValueError as streamError:
+                systemResponseMessage = "\n[ERROR] Sorry, " + str(streamError) + ", stream skipped.\n"
+                self.systemResponse.text_color = "red"
+                self.systemResponse.fail(systemResponseMessage)
+
+        if len(trackingStreams) == 0:
+            return
+
+        print("\n**************************************************************************")
+        print("Processing streams:")
+        print("**************************************************************************\n")
+
+        streamPool = concurrent.futures.ThreadPoolExecutor(max_workers=int(streamWorkers))
+        runningSteps = {}
+        reportTime = time.time()
+
+        try:
+            while True:
+                currentTime = time.perf_counter()
+
+                # Earliest deadline first among idle streams, every stream gets its turn
+                dueStreams = [trackingStream for trackingStream in trackingStreams if trackingStream not in runningSteps.values() and trackingStream.nextDeadline <= currentTime]
+                dueStreams.sort(key=lambda trackingStream: trackingStream.nextDeadline)
+
+                for trackingStream in dueStreams[:max(0, int(streamWorkers) - len(runningSteps))]:
+                    trackingStream.scheduleNext(currentTime)
+                    runningSteps[streamPool.submit(trackingStream.step)] = trackingStream
+
+                # Every worker busy, only a finished step can dispatch more
+                if len(runningSteps) >= int(streamWorkers):
+                    waitTime = None
+
+                # Wait for a finished step or the next deadline
+                else:
+                    nextDeadlines = [trackingStream.nextDeadline for trackingStream in trackingStreams if trackingStream not in runningSteps.values()]
+                    waitTime = max(0.0, min(nextDeadlines) - time.perf_counter()) if len(nextDeadlines) > 0 else None
+
+                if len(runningSteps) > 0:
+                    finishedSteps, pendingSteps = concurrent.futures.wait(list(runningSteps.keys()), timeout=waitTime, return_when=concurrent.futures.FIRST_COMPLETED)
+
+                    for finishedStep in finishedSteps:
+                        del runningSteps[finishedStep]
+
+                elif waitTime is not None:
+                    time.sleep(waitTime)
+
+                # Report per-stream fps every 10 seconds
+                if time.time() - reportTime >= 10:
+                    for trackingStream in trackingStreams:
+                        systemResponseMessage = "\n[INFO] Stream " + str(trackingStream.streamName) + ": " + str(round(trackingStream.getFPS(time.time() - reportTime), 2)) + " fps of " + str(trackingStream.streamFPS) + " fps budget.\n"
+                        self.systemResponse.text_color = "blue"
+                        self.systemResponse.info(systemResponseMessage)
+
+                    reportTime = time.time()
+
+        except KeyboardInterrupt:
+            systemResponseMessage = "\n[INFO] Stopping streams ...\n"
+            self.systemResponse.text_color = "yellow"
+            self.systemResponse.warn(systemResponseMessage)
+
+        streamPool.shutdown(wait=True)
+
+        for trackingStream in trackingStreams:
+            trackingStream.close()
+
+    # Function: getSeedTargets
+    def getSeedTargets(self, seedsFile):
+
+        # Seeds file: one target per line, x,y,width,height
+        boxes = []
+
+        with open(seedsFile, 'r') as seedsData:
+            for seedLine in seedsData:
+                seedLine = seedLine.strip()
+
+                if seedLine == "" or seedLine.startswith("#"):
+                    continue
+
+                boxes.append([float(value) for value in seedLine.replace(";", ",").split(",")[:4]])
+
+        return np.array(boxes, dtype=np.float64).reshape(-1, 4)
+
+    # Function: writeTracks
+    def writeTracks(self, tracksData, frameIndex, timestamp, boxes, targetIDs):
+
+        # One CSV row per target: frame,timestamp,id,x,y,width,height
+        for box, targetID in zip(boxes, targetIDs):
+            tracksData.write(str(frameIndex) + "," + str(round(timestamp, 3)) + "," + str(int(targetID)) + "," + ",".join(str(round(float(value), 2)) for value in box) + "\n")
+
+        return len(targetIDs)
+
+    # Function: processVideoFile
+    def processVideoFile(self, trackerType, imageWidth, imageHeight, videoFile, seedsFile, outputFile):
+
+        # Seed targets from file, detector otherwise, fail before decoding if neither is available
+        if seedsFile is not None and os.path.isfile(str(seedsFile)):
+            seedBoxes = self.getSeedTargets(seedsFile)
+
+        elif self.targetDetector is not None:
+            seedBoxes = None
+
+        else:
+            raise ValueError("no seeds file " + str(seedsFile) + " nor detector, targets can not be selected")
+
+        captureDevice = cv2.VideoCapture(str(videoFile))
+        videoFPS = captureDevice.get(cv2.CAP_PROP_FPS)
+
+        if videoFPS is None or float(videoFPS) <= 0:
+            videoFPS = 30.0
+
+        # Decode in parallel with tracking, never drop frames
+        captureThread, capturePolicy, captureQueueSize = self.getCaptureConfiguration()
+
+        if int(captureThread) == 1:
+            captureDevice = FrameCaptureStage(captureDevice, 0, "lossless", captureQueueSize)
+
+        trackerEngine = None
+        frameIndex = 0
+        processedTracks = 0
+
+        with open(outputFile, 'w') as tracksData:
+            tracksData.write("frame,timestamp,id,x,y,width,height\n")
+
+            while True:
+                success, dataToSolve = captureDevice.read()
+
+                if not success or dataToSolve is None:
+                    break
+
+                # Same processing resolution as live mode
+                if dataToSolve.shape[1] != imageWidth or dataToSolve.shape[0] != imageHeight:
+                    dataToSolve = cv2.resize(dataToSolve, (imageWidth, imageHeight))
+
+                if self.targetDetector is not None:
+                    self.targetDetector.learn(self.getTrackingFrame(dataToSolve))
+
+                if trackerEngine is None:
+
+                    if seedBoxes is not None:
+                        self.trackStore.updateDetections(seedBoxes, None, 1, 1)
+
+                    elif self.targetDetector is not None:
+                        boxes, colors = self.getDetectedTargets(dataToSolve)
+                        self.trackStore.updateDetections(boxes, colors, 0, 0, dataToSolve)
+
+                    if self.trackStore.getActive().any():
+                        trackerEngine = self.buildTrackerEngine(trackerType, dataToSolve)
+
+                else:
+                    trackerEngine = self.updateTargets(trackerType, trackerEngine, dataToSolve, frameIndex)
+
+                    # Every target lost, seed again from detector
+                    if not self.trackStore.getActive().any():
+                        trackerEngine = None
+                        seedBoxes = None
+
+                # Write confirmed tracks
+                boxes, colors, targetIDs = self.trackStore.getConfirmedTracks()
+                timestamp = frameIndex * 1000.0 / float(videoFPS)
+
+                processedTracks = processedTracks + self.writeTracks(tracksData, frameIndex, timestamp, boxes, targetIDs)
+
+                frameIndex = frameIndex + 1
+
+        if isinstance(captureDevice, FrameCaptureStage):
+            captureDevice.close()
+            captureDevice = captureDevice.captureSource
+
+        captureDevice.release()
+
+        return frameIndex, processedTracks
+
+    # Function: processBatchRequests
+    def processBatchRequests(self, trackerType, imageWidth, imageHeight, videoFiles, seedsFile, outputDirectory, batchWorkers):
+
+        print("\n**************************************************************************")
+        print("Batch processing:")
+        print("**************************************************************************\n")
+
+        if not os.path.isdir(outputDirectory):
+            os.makedirs(outputDirectory)
+
+        # Build one job per video file, seeds file next to video if not provided
+        batchJobs = []
+
+        for videoFile in videoFiles:
+            videoName = os.path.splitext(os.path.basename(videoFile))[0]
+
+            if seedsFile is not None:
+                videoSeedsFile = seedsFile
+
+            else:
+                videoSeedsFile = os.path.splitext(videoFile)[0] + ".seeds"
+
+            batchJobs.append((trackerType, imageWidth, imageHeight, videoFile, videoSeedsFile, os.path.join(outputDirectory, videoName + ".tracks.csv"), self.getConfigurationData()))
+
+        # One worker per core by default
+        if int(batchWorkers) <= 0:
+            batchWorkers = os.cpu_count() or 1
+
+        batchWorkers = max(1, min(int(batchWorkers), len(batchJobs)))
+
+        startTime = time.time()
+
+        import multiprocessing
+
+        with multiprocessing.Pool(batchWorkers) as batchPool:
+            for videoFile, processedFrames, processedTracks, errorMessage in batchPool.imap_unordered(processBatchJob, batchJobs):
+
+                if errorMessage is None:
+                    systemResponseMessage = "\n[INFO] " + str(videoFile) + " processed: " + str(processedFrames) + " frames, " + str(processedTracks) + " tracks.\n"
+                    self.systemResponse.text_color = "green"
+                    self.systemResponse.succeed(systemResponseMessage)
+
+                else:
+                    systemResponseMessage = "\n[ERROR] Sorry, i couldn´t process " + str(videoFile) + ": " + str(errorMessage) + ".\n"
+                    self.systemResponse.text_color = "red"
+                    self.systemResponse.fail(systemResponseMessage)
+
+        systemResponseMessage = "\n[INFO] Batch processing done in " + str(round(time.time() - startTime, 2)) + " seconds with " + str(batchWorkers) + " workers.\n"
+        self.systemResponse.text_color = "green"
+        self.systemResponse.succeed(systemResponseMessage)
+
+
+    # Function: getPeakMemory
+    def getPeakMemory(self):
+
+        # Peak resident memory in MB, not available on Windows
+        try:
+            import resource
+            peakMemory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+            # Linux reports KB, macOS reports bytes
+            if platform.system() == "Darwin":
+                peakMemory = peakMemory / 1024.0
+
+            peakMemory = round(peakMemory / 1024.0, 2)
+
+        except:
+            peakMemory = -1
+
+        return peakMemory
+
+    # Function: runTrackerBenchmark
+    def runTrackerBenchmark(self, trackerType, targetsNumber, imageWidth, imageHeight, benchmarkFrames):
+
+        syntheticScene = SyntheticScene(imageWidth, imageHeight, targetsNumber, 1)
+
+        # Initialize every target on ground truth
+        dataToSolve, groundTruthBoxes = syntheticScene.getFrame()
+        trackerEngine = self.addTargets(self.getObjectTracker(), trackerType, self.getTrackingFrame(dataToSolve), self.scaleBoxes(groundTruthBoxes, 1.0 / self.trackingScale))
+
+        frameLatencies = []
+        intersectionsOverUnion = []
+        centerErrors = []
+        intersectionOverUnionCalculator = TrackStore("greedy", 0.3, 3, 10, 300, None, None)
+
+        for frameIndex in range(0, int(benchmarkFrames)):
+            syntheticScene.moveTargets()
+            dataToSolve, groundTruthBoxes = syntheticScene.getFrame()
+
+            # Only tracking is timed, scene generation is not
+            startTime = time.perf_counter()
+            success, boxes = trackerEngine.update(self.getTrackingFrame(dataToSolve))
+            boxes = self.scaleBoxes(boxes, self.trackingScale)
+            frameLatencies.append(time.perf_counter() - startTime)
+
+            # Accuracy against ground truth, target by target
+            intersectionsOverUnion.append(np.diagonal(intersectionOverUnionCalculator.getIntersectionOverUnion(boxes, groundTruthBoxes)))
+            centerErrors.append(np.hypot((boxes[:, 0] + boxes[:, 2] / 2) - (groundTruthBoxes[:, 0] + groundTruthBoxes[:, 2] / 2), (boxes[:, 1] + boxes[:, 3] / 2) - (groundTruthBoxes[:, 1] + groundTruthBoxes[:, 3] / 2)))
+
+        frameLatencies = np.array(frameLatencies) * 1000.0
+        intersectionsOverUnion = np.concatenate(intersectionsOverUnion)
+        centerErrors = np.concatenate(centerErrors)
+
+        benchmarkResults = {
+            'fps': round(len(frameLatencies) / max(frameLatencies.sum() / 1000.0, 1e-9), 2),
+            'p50': round(float(np.percentile(frameLatencies, 50)), 3),
+            'p95': round(float(np.percentile(frameLatencies, 95)), 3),
+            'p99': round(float(np.percentile(frameLatencies, 99)), 3),
+            'memory': self.getPeakMemory(),
+            'iou': round(float(intersectionsOverUnion.mean()), 3),
+            'success': round(float((intersectionsOverUnion >= 0.5).mean()), 3),
+            'center': round(float(centerErrors.mean()), 2)
+        }
+
+        return benchmarkResults
+
+    # Function: processBenchmarkRequests
+    def processBenchmarkRequests(self, benchmarkTrackers, benchmarkTargets, benchmarkResolutions, benchmarkFrames, benchmarkOutput):
+
+        print("\n**************************************************************************")
+        print("Benchmark:")
+        print("**************************************************************************\n")
+
+        # Every tracker type by default
+        if str(benchmarkTrackers).strip() != "":
+            trackerTypes = [trackerType.strip().upper() for trackerType in str(benchmarkTrackers).split(",")]
+
+        else:
+            trackerTypes = self.objectTrackerTypes
+
+        targetsNumbers = [int(targetsNumber) for targetsNumber in str(benchmarkTargets).split(",")]
+        resolutions = [[int(value) for value in resolution.lower().split("x")] for resolution in str(benchmarkResolutions).split(",")]
+
+        benchmarkJobs = []
+
+        for trackerType in trackerTypes:
+            for imageWidth, imageHeight in resolutions:
+                for targetsNumber in targetsNumbers:
+                    benchmarkJobs.append((trackerType, targetsNumber, imageWidth, imageHeight, benchmarkFrames, self.getConfigurationData()))
+
+        with open(benchmarkOutput, 'w') as benchmarkData:
+            benchmarkData.write("tracker,targets,width,height,frames,fps,p50,p95,p99,memory,iou,success,center\n")
+
+            # One fresh process per run, runs never share memory peaks or OpenCV state
+            import multiprocessing
+
+            with multiprocessing.Pool(1, maxtasksperchild=1) as benchmarkPool:
+                for benchmarkJob, benchmarkResults, errorMessage in benchmarkPool.imap(processBenchmarkJob, benchmarkJobs):
+
+                    trackerType, targetsNumber, imageWidth, imageHeight, benchmarkFrames, configurationData = benchmarkJob
+
+                    if errorMessage is not None:
+                        systemResponseMessage = "\n[ERROR] Sorry, i couldn´t benchmark " + str(trackerType) + ": " + str(errorMessage) + ".\n"
+                        self.systemResponse.text_color = "red"
+                        self.systemResponse.fail(systemResponseMessage)
+                        continue
+
+                    systemResponseMessage = "\n[BENCHMARK] " + str(trackerType) + " " + str(targetsNumber) + " targets " + str(imageWidth) + "x" + str(imageHeight) + ": " + str(benchmarkResults['fps']) + " fps, p50 " + str(benchmarkResults['p50']) + " ms, p95 " + str(benchmarkResults['p95']) + " ms, p99 " + str(benchmarkResults['p99']) + " ms, memory " + str(benchmarkResults['memory']) + " MB, IoU " + str(benchmarkResults['iou']) + ", success " + str(benchmarkResults['success']) + ", center error " + str(benchmarkResults['center']) + " px.\n"
+                    self.systemResponse.text_color = "green"
+                    self.systemResponse.succeed(systemResponseMessage)
+
+                    benchmarkData.write(",".join(str(value) for value in [trackerType, targetsNumber, imageWidth, imageHeight, benchmarkFrames, benchmarkResults['fps'], benchmarkResults['p50'], benchmarkResults['p95'], benchmarkResults['p99'], benchmarkResults['memory'], benchmarkResults['iou'], benchmarkResults['success'], benchmarkResults['center']]) + "\n")
+
+        systemResponseMessage = "\n[INFO] Benchmark results saved in " + str(benchmarkOutput) + ".\n"
+        self.systemResponse.text_color = "green"
+        self.systemResponse.succeed(systemResponseMessage)
+
+
+class TrackingStream:
+
+    # Function: Constructor
+    def __init__(self, streamServer, streamName, streamSource, streamSeed, streamFPS, trackerType, imageWidth, imageHeight, yarpSend, yarpReceive):
+
+        # Build Halo spinner
+        self.systemResponse = Halo(spinner='dots')
+
+        self.streamName = str(streamName)
+        self.streamFPS = max(0.1, float(streamFPS))
+        self.trackerType = trackerType
+        self.imageWidth = imageWidth
+        self.imageHeight = imageHeight
+        self.yarpSend = int(yarpSend)
+        self.yarpReceive = int(yarpReceive)
+
+        # Build stream tracker, headless, sharing server configuration and tracker pool
+        self.multipleObjectTracker2D = MultipleObjectTracker2D()
+        self.multipleObjectTracker2D.authenticationData = streamServer.authenticationData
+        self.multipleObjectTracker2D.verboseOutput = streamServer.verboseOutput
+        self.multipleObjectTracker2D.dataFormat = streamServer.dataFormat
+        self.multipleObjectTracker2D.getTrackerConfiguration()
+        self.multipleObjectTracker2D.getDetectionConfiguration()
+        self.multipleObjectTracker2D.getTrackStoreConfiguration()
+        self.multipleObjectTracker2D.trackerPool = streamServer.trackerPool
+        self.multipleObjectTracker2D.displayOutput = 0
+
+        # Headless, targets never selected interactively
+        self.multipleObjectTracker2D.selectTargets = 0
+
+        # Seed targets from file, detector otherwise
+        if str(streamSeed) != "" and os.path.isfile(str(streamSeed)):
+            self.multipleObjectTracker2D.seedBoxes = self.multipleObjectTracker2D.getSeedTargets(streamSeed)
+            self.multipleObjectTracker2D.reseedBoxes = self.multipleObjectTracker2D.seedBoxes
+
+        elif self.multipleObjectTracker2D.targetDetector is None:
+            raise ValueError("stream " + str(self.streamName) + " has no seeds file nor detector, targets can not be selected")
+
+        # Per-stream port namespace
+        portNamespace = "/multipleObjectTracker2D/" + self.streamName
+
+        if self.yarpSend == 1:
+            self.outputImagePort = YarpImagePort(portNamespace + "/img:o", imageWidth, imageHeight)
+            self.outputDataPort = YarpDataPort(portNamespace + "/data:o")
+            self.outputImagePort, self.outputDataPort = self.multipleObjectTracker2D.getOutputPublishers(self.outputImagePort, self.outputDataPort)
+
+        else:
+            self.outputImagePort = "null"
+            self.outputDataPort = "null"
+
+        captureThread, capturePolicy, captureQueueSize = self.multipleObjectTracker2D.getCaptureConfiguration()
+
+        if self.yarpReceive == 1:
+            self.inputImagePort = YarpImagePort(portNamespace + "/img:i", imageWidth, imageHeight, captureQueueSize + 2)
+
+        else:
+            self.inputImagePort = self.multipleObjectTracker2D.initializaCaptureDevices(streamSource)
+
+        # Live streams keep only newest frame
+        self.inputImagePort = FrameCaptureStage(self.inputImagePort, self.yarpReceive, capturePolicy, captureQueueSize)
+
+        # Scheduling state
+        self.nextDeadline = time.perf_counter()
+        self.processedFrames = 0
+
+    # Function: scheduleNext
+    def scheduleNext(self, currentTime):
+
+        # Keep fps budget, do not accumulate late steps
+        self.nextDeadline = max(self.nextDeadline + 1.0 / self.streamFPS, currentTime)
+
+    # Function: step
+    def step(self):
+
+        # Capture, track and publish one frame
+        try:
+            self.multipleObjectTracker2D.processFrame(self.trackerType, self.imageWidth, self.imageHeight, self.yarpSend, self.yarpReceive, self.outputImagePort, self.outputDataPort, self.inputImagePort)
+            self.processedFrames = self.processedFrames + 1
+
+        except:
+            systemResponseMessage = "\n[ERROR] Sorry, i couldn´t resolve stream " + str(self.streamName) + " request.\n"
+            self.systemResponse.text_color = "red"
+            self.systemResponse.fail(systemResponseMessage)
+
+    # Function: getFPS
+    def getFPS(self, elapsedTime):
+
+        streamFPS = self.processedFrames / max(elapsedTime, 1e-9)
+        self.processedFrames = 0
+
+        return streamFPS
+
+    # Function: close
+    def close(self):
+
+        captureSource = self.inputImagePort.captureSource
+        self.inputImagePort.close()
+
+        if self.yarpReceive == 1:
+            captureSource.close()
+
+        else:
+            captureSource.release()
+
+        if self.yarpSend == 1:
+            self.outputImagePort.close()
+            self.outputDataPort.close()
+
+
+class SyntheticScene:
+
+    # Function: Constructor
+    def __init__(self, imageWidth, imageHeight, targetsNumber, sceneSeed):
+
+        self.imageWidth = int(imageWidth)
+        self.imageHeight = int(imageHeight)
+        self.targetsNumber = int(targetsNumber)
+
+        # Reproducible scene
+        randomGenerator = np.random.RandomState(int(sceneSeed))
+
+        # Static low frequency textured background
+        backgroundNoise = randomGenerator.randint(0, 256, (max(2, self.imageHeight // 16), max(2, self.imageWidth // 16), 3)).astype(np.uint8)
+        self.background = cv2.resize(backgroundNoise, (self.imageWidth, self.imageHeight), interpolation=cv2.INTER_CUBIC)
+
+        # Targets with high frequency textures, known size, position and velocity
+        targetSize = max(16, min(self.imageWidth, self.imageHeight) // 10)
+
+        self.targetTextures = []
+        self.boxes = np.zeros((self.targetsNumber, 4), dtype=np.float64)
+        self.velocities = np.zeros((self.targetsNumber, 2), dtype=np.float64)
+
+        for targetIndex in range(0, self.targetsNumber):
+            targetWidth = int(targetSize * randomGenerator.uniform(0.7, 1.3))
+            targetHeight = int(targetSize * randomGenerator.uniform(0.7, 1.3))
+
+            targetNoise = randomGenerator.randint(0, 256, (max(2, targetHeight // 4), max(2, targetWidth // 4), 3)).astype(np.uint8)
+            targetTexture = cv2.resize(targetNoise, (targetWidth, targetHeight), interpolation=cv2.INTER_NEAREST)
+            cv2.rectangle(targetTexture, (0, 0), (targetWidth - 1, targetHeight - 1), (255, 255, 255), 2)
+            self.targetTextures.append(targetTexture)
+
+            self.boxes[targetIndex] = [randomGenerator.uniform(0, self.imageWidth - targetWidth), randomGenerator.uniform(0, self.imageHeight - targetHeight), targetWidth, targetHeight]
+            self.velocities[targetIndex] = randomGenerator.uniform(-4, 4, 2) * (min(self.imageWidth, self.imageHeight) / 480.0)
+
+    # Function: getFrame
+    def getFrame(self):
+
+        dataToSolve = self.background.copy()
+
+        for targetTexture, box in zip(self.targetTextures, self.boxes):
+            leftX = int(round(box[0]))
+            topY = int(round(box[1]))
+            dataToSolve[topY:topY + targetTexture.shape[0], leftX:leftX + targetTexture.shape[1]] = targetTexture
+
+        # Ground truth boxes drawn on this frame
+        return dataToSolve, np.round(self.boxes).copy()
+
+    # Function: moveTargets
+    def moveTargets(self):
+
+        self.boxes[:, 0:2] = self.boxes[:, 0:2] + self.velocities
+
+        # Bounce on image borders
+        maxPosition = np.stack([self.imageWidth - self.boxes[:, 2], self.imageHeight - self.boxes[:, 3]], axis=1)
+        outOfImage = (self.boxes[:, 0:2] < 0) | (self.boxes[:, 0:2] > maxPosition)
+        self.velocities[outOfImage] = -self.velocities[outOfImage]
+        self.boxes[:, 0:2] = np.clip(self.boxes[:, 0:2], 0, maxPosition)
+
+
+class PerformanceMonitor:
+
+    # Function: Constructor
+    def __init__(self, statisticsEnabled, statisticsWindow, statisticsInterval, statisticsFile, statisticsPort):
+
+        # Build Halo spinner
+        self.systemResponse = Halo(spinner='dots')
+
+        self.statisticsEnabled = int(statisticsEnabled)
+        self.statisticsWindow = max(1, int(statisticsWindow))
+        self.statisticsInterval = float(statisticsInterval)
+        self.statisticsFile = str(statisticsFile)
+        self.statisticsPort = statisticsPort
+
+        # Rolling stage durations and gauge metrics
+        self.stageTimes = {}
+        self.metrics = {}
+
+        # Frame counters for fps
+        self.processedFrames = 0
+        self.reportTime = time.perf_counter()
+
+    # Function: start
+    def start(self):
+
+        # Disabled monitor costs one comparison
+        if self.statisticsEnabled == 0:
+            return 0.0
+
+        return time.perf_counter()
+
+    # Function: stop
+    def stop(self, stageName, stageStart):
+
+        if self.statisticsEnabled == 0:
+            return 0.0
+
+        stageStop = time.perf_counter()
+
+        if stageName not in self.stageTimes:
+            self.stageTimes[stageName] = collections.deque(maxlen=self.statisticsWindow)
+
+        self.stageTimes[stageName].append(stageStop - stageStart)
+
+        # Next stage starts when this one stops
+        return stageStop
+
+    # Function: setMetric
+    def setMetric(self, metricName, metricValue):
+
+        if self.statisticsEnabled == 1:
+            self.metrics[metricName] = metricValue
+
+    # Function: frame
+    def frame(self):
+
+        if self.statisticsEnabled == 0:
+            return
+
+        self.processedFrames = self.processedFrames + 1
+
+        if time.perf_counter() - self.reportTime >= self.statisticsInterval:
+            self.report()
+
+    # Function: getStatistics
+    def getStatistics(self):
+
+        elapsedTime = max(time.perf_counter() - self.reportTime, 1e-9)
+
+        statistics = {'timestamp': time.time(), 'fps': round(self.processedFrames / elapsedTime, 2), 'stages': {}, 'metrics': dict(self.metrics)}
+
+        # Rolling percentiles in milliseconds
+        for stageName, stageTimes in self.stageTimes.items():
+            if len(stageTimes) > 0:
+                percentiles = np.percentile(np.fromiter(stageTimes, dtype=np.float64, count=len(stageTimes)), [50, 95, 99]) * 1000.0
+                statistics['stages'][stageName] = {'p50': round(float(percentiles[0]), 3), 'p95': round(float(percentiles[1]), 3), 'p99': round(float(percentiles[2]), 3)}
+
+        return statistics
+
+    # Function: report
+    def report(self):
+
+        statistics = self.getStatistics()
+
+        # Summary line
+        summaryLine = "fps " + str(statistics['fps'])
+
+        for stageName, stagePercentiles in statistics['stages'].items():
+            summaryLine = summaryLine + " | " + str(stageName) + " p50 " + str(stagePercentiles['p50']) + " p95 " + str(stagePercentiles['p95']) + " p99 " + str(stagePercentiles['p99']) + " ms"
+
+        for metricName, metricValue in statistics['metrics'].items():
+            summaryLine = summaryLine + " | " + str(metricName) + " " + str(metricValue)
+
+        systemResponseMessage = "\n[STATS] " + summaryLine + ".\n"
+        self.systemResponse.text_color = "blue"
+        self.systemResponse.info(systemResponseMessage)
+
+        # Statistics file, CSV rows or JSON lines
+        if self.statisticsFile != "":
+            try:
+                if self.statisticsFile.endswith(".csv"):
+                    writeHeader = not os.path.isfile(self.statisticsFile)
+
+                    with open(self.statisticsFile, 'a') as statisticsData:
+                        if writeHeader:
+                            statisticsData.write("timestamp,fps,stage,p50,p95,p99\n")
+
+                        for stageName, stagePercentiles in statistics['stages'].items():
+                            statisticsData.write(str(statistics['timestamp']) + "," + str(statistics['fps']) + "," + str(stageName) + "," + str(stagePercentiles['p50']) + "," + str(stagePercentiles['p95']) + "," + str(stagePercentiles['p99']) + "\n")
+
+                else:
+                    with open(self.statisticsFile, 'a') as statisticsData:
+                        statisticsData.write(json.dumps(statistics) + "\n")
+
+            except:
+                systemResponseMessage = "\n[ERROR] Sorry, i couldn´t write statistics to " + str(self.statisticsFile) + ".\n"
+                self.systemResponse.text_color = "red"
+                self.systemResponse.fail(systemResponseMessage)
+
+        # YARP statistics port
+        if str(self.statisticsPort) != "null":
+            self.statisticsPort.send(json.dumps(statistics))
+
+        # Restart fps window
+        self.processedFrames = 0
+        self.reportTime = time.perf_counter()
+
+
+class ConfigurationWatcher:
+
+    # Function: Constructor
+    def __init__(self, configurationFile, checkInterval):
+
+        self.configurationFile = str(configurationFile)
+        self.checkInterval = float(checkInterval)
+
+        self.lastCheckTime = time.perf_counter()
+        self.lastModified = self.getModified()
+
+    # Function: getModified
+    def getModified(self):
+
+        try:
+            fileStatus = os.stat(self.configurationFile)
+            return fileStatus.st_mtime_ns, fileStatus.st_size
+
+        except:
+            return None
+
+    # Function: hasChanged
+    def hasChanged(self):
+
+        # Check file at most once per interval, one stat call
+        currentTime = time.perf_counter()
+
+        if currentTime - self.lastCheckTime < self.checkInterval:
+            return False
+
+        self.lastCheckTime = currentTime
+        modified = self.getModified()
+
+        # Missing file while being saved is not a change
+        if modified is None or modified == self.lastModified:
+            return False
+
+        self.lastModified = modified
+
+        return True
+
+
+class OverlayRenderer:
+
+    # Function: Constructor
+    def __init__(self, maxSprites=1024):
+
+        # Label font, same look as cv2.putText labels
+        self.fontFace = cv2.FONT_HERSHEY_SIMPLEX
+        self.fontScale = 0.7
+        self.fontThickness = 2
+
+        # Pre-rendered label sprites by label and color
+        self.labelSprites = {}
+        self.maxSprites = int(maxSprites)
+
+    # Function: getLabelSprite
+    def getLabelSprite(self, label, color):
+
+        spriteKey = (label, color)
+
+        if spriteKey in self.labelSprites:
+            return self.labelSprites[spriteKey]
+
+        # Forget sprites of old tracks
+        if len(self.labelSprites) >= self.maxSprites:
+            self.labelSprites.clear()
+
+        # Render label once into a coverage mask, with margin for stroke thickness
+        (textWidth, textHeight), textBaseline = cv2.getTextSize(label, self.fontFace, self.fontScale, self.fontThickness)
+        labelMask = np.zeros((textHeight + textBaseline + 2 * self.fontThickness, textWidth + 2 * self.fontThickness), np.uint8)
+        cv2.putText(labelMask, label, (self.fontThickness, textHeight + self.fontThickness), self.fontFace, self.fontScale, 255, self.fontThickness)
+
+        labelImage = np.empty(labelMask.shape + (3,), np.uint8)
+        labelImage[:] = color
+
+        # OpenCV builds with antialiased text only give partial coverage, edges are blended with it
+        if ((labelMask > 0) & (labelMask < 255)).any():
+            labelAlpha = labelMask[:, :, np.newaxis].astype(np.uint16)
+
+        else:
+            labelAlpha = None
+
+        # Sprite offset from text origin to its up-left corner
+        self.labelSprites[spriteKey] = (labelImage, labelMask, labelAlpha, self.fontThickness, textHeight + self.fontThickness)
+
+        return self.labelSprites[spriteKey]
+
+    # Function: render
+    def render(self, dataToSolve, boxes, colors, labels):
+
+        imageHeight, imageWidth = dataToSolve.shape[:2]
+
+        for box, color, label in zip(boxes, colors, labels):
+            color = tuple(int(channel) for channel in color)
+
+            # Rectangle from up-left to down-right box point
+            cv2.rectangle(dataToSolve, (int(box[0]), int(box[1])), (int(box[0] + box[2]), int(box[1] + box[3])), color, 2, 1)
+
+            # Label under box, cached sprite copied through its mask
+            labelImage, labelMask, labelAlpha, offsetX, offsetY = self.getLabelSprite(label, color)
+
+            spriteX = int(box[0]) - offsetX
+            spriteY = int(box[1] + box[3]) + 20 - offsetY
+
+            x0 = max(0, spriteX)
+            y0 = max(0, spriteY)
+            x1 = min(imageWidth, spriteX + labelMask.shape[1])
+            y1 = min(imageHeight, spriteY + labelMask.shape[0])
+
+            if x1 <= x0 or y1 <= y0:
+                continue
+
+            if labelAlpha is None:
+                cv2.copyTo(labelImage[y0 - spriteY:y1 - spriteY, x0 - spriteX:x1 - spriteX], labelMask[y0 - spriteY:y1 - spriteY, x0 - spriteX:x1 - spriteX], dataToSolve[y0:y1, x0:x1])
+                continue
+
+            # Antialiased sprite blended with its coverage
+            spriteAlpha = labelAlpha[y0 - spriteY:y1 - spriteY, x0 - spriteX:x1 - spriteX]
+            dataToSolve[y0:y1, x0:x1] = (dataToSolve[y0:y1, x0:x1] * (255 - spriteAlpha) + labelImage[y0 - spriteY:y1 - spriteY, x0 - spriteX:x1 - spriteX] * spriteAlpha + 127) // 255
+
+        return dataToSolve
+
+
+class LogRateLimiter:
+
+    # Function: Constructor
+    def __init__(self, logInterval, maxSummaryItems=10):
+
+        # Seconds between messages of each kind, 0 logs everything
+        self.logInterval = float(logInterval)
+        self.maxSummaryItems = int(maxSummaryItems)
+        self.lastLogTimes = {}
+
+    # Function: shouldLog
+    def shouldLog(self, logKey):
+
+        if self.logInterval <= 0:
+            return True
+
+        currentTime = time.perf_counter()
+
+        if logKey in self.lastLogTimes and currentTime - self.lastLogTimes[logKey] < self.logInterval:
+            return False
+
+        self.lastLogTimes[logKey] = currentTime
+
+        return True
+
+    # Function: getSummary
+    def getSummary(self, logItems):
+
+        summary = "; ".join(str(logItem) for logItem in logItems[:self.maxSummaryItems])
+
+        if len(logItems) > self.maxSummaryItems:
+            summary = summary + "; ... " + str(len(logItems) - self.maxSummaryItems) + " more"
+
+        return summary
+
+
+class FrameSkipScheduler:
+
+    # Function: Constructor
+    def __init__(self, frameBudget, maxFrameSkip):
+
+        # Seconds available per frame and largest tracker update period
+        self.frameBudget = max(1e-3, float(frameBudget))
+        self.maxFrameSkip = max(1, int(maxFrameSkip))
+
+        # Track every N frames, 1 tracks every frame
+        self.frameSkip = 1
+        self.skippedFrames = 0
+
+        # Smoothed tracker update cost and remaining per frame cost
+        self.smoothingFactor = 0.1
+        self.trackCost = None
+        self.frameCost = None
+
+        # Rolling tracked or skipped history for skip ratio
+        self.frameHistory = collections.deque(maxlen=300)
+
+    # Function: shouldTrack
+    def shouldTrack(self):
+
+        if self.skippedFrames + 1 >= self.frameSkip:
+            self.skippedFrames = 0
+            self.frameHistory.append(0)
+            return True
+
+        self.skippedFrames = self.skippedFrames + 1
+        self.frameHistory.append(1)
+
+        return False
+
+    # Function: getSmoothed
+    def getSmoothed(self, smoothedValue, newValue):
+
+        if smoothedValue is None:
+            return newValue
+
+        return smoothedValue + self.smoothingFactor * (newValue - smoothedValue)
+
+    # Function: recordFrame
+    def recordFrame(self, frameTime, trackTime):
+
+        # Tracker cost on tracked frames, everything else on every frame
+        if trackTime is not None:
+            self.trackCost = self.getSmoothed(self.trackCost, trackTime)
+            frameTime = frameTime - trackTime
+
+        self.frameCost = self.getSmoothed(self.frameCost, max(0.0, frameTime))
+
+        if self.trackCost is None:
+            return
+
+        # Tracker cost spread over N frames must fit in what the rest of the frame leaves
+        availableTime = self.frameBudget - self.frameCost
+
+        if availableTime <= 0.0:
+            self.frameSkip = self.maxFrameSkip
+
+        else:
+            self.frameSkip = int(min(self.maxFrameSkip, max(1, np.ceil(self.trackCost / availableTime))))
+
+    # Function: getSkipRatio
+    def getSkipRatio(self):
+
+        if len(self.frameHistory) == 0:
+            return 0.0
+
+        return sum(self.frameHistory) / len(self.frameHistory)
+
+
+class TargetDetector:
+
+    # Supported detector types
+    detectorTypes = ['background', 'cascade', 'dnn']
+
+    # Function: Constructor
+    def __init__(self, detectorType, detectorModel, detectorConfig, detectorConfidence, detectorMinArea, detectorInputSize="300x300", detectorMean="104,177,123", detectorScale=1.0, detectorSwapRB=0, detectorClasses=""):
+
+        # Build Halo spinner
+        self.systemResponse = Halo(spinner='dots')
+
+        self.detectorType = detectorType
+        self.detectorConfidence = float(detectorConfidence)
+        self.detectorMinArea = int(detectorMinArea)
+
+        # DNN preprocessing as the model was trained: input WIDTHxHEIGHT, per-channel mean, pixel scale and channel order
+        self.detectorInputSize = tuple(int(value) for value in str(detectorInputSize).lower().split("x"))
+        self.detectorMean = tuple(float(value) for value in str(detectorMean).split(","))
+        self.detectorScale = float(detectorScale)
+        self.detectorSwapRB = int(detectorSwapRB) == 1
+
+        # Accepted class IDs, every class if empty
+        if str(detectorClasses).strip() != "":
+            self.detectorClasses = set(int(value) for value in str(detectorClasses).split(","))
+
+        else:
+            self.detectorClasses = None
+
+        # Background subtraction detector
+        if self.detectorType == "background":
+            self.detector = cv2.createBackgroundSubtractorMOG2(detectShadows=False)
+            self.morphologyKernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+            self.foregroundMask = None
+            self.learnedFrames = 0
+
+        # Haar or LBP cascade detector loaded from local file
+        elif self.detectorType == "cascade":
+            self.detector = cv2.CascadeClassifier(str(detectorModel))
+
+        # DNN SSD style detector loaded from local files
+        else:
+            if str(detectorConfig) != "":
+                self.detector = cv2.dnn.readNet(str(detectorModel), str(detectorConfig))
+
+            else:
+                self.detector = cv2.dnn.readNet(str(detectorModel))
+
+        systemResponseMessage = "\n[INFO] Target detector " + str(self.detectorType) + " loaded correctly.\n"
+        self.systemResponse.text_color = "green"
+        self.systemResponse.succeed(systemResponseMessage)
+
+    # Function: learn
+    def learn(self, dataToSolve):
+
+        # Only background model needs every frame
+        if self.detectorType == "background":
+            self.foregroundMask = self.detector.apply(dataToSolve)
+            self.learnedFrames = self.learnedFrames + 1
+
+    # Function: detect
+    def detect(self, dataToSolve):
+
+        boxes = []
+
+        if self.detectorType == "background":
+
+            # First frames are all foreground until background model settles
+            if self.foregroundMask is None or self.learnedFrames < 10:
+                return np.zeros((0, 4), dtype=np.float64)
+
+            # Clean foreground mask and get moving blobs
+            foregroundMask = cv2.morphologyEx(self.foregroundMask, cv2.MORPH_OPEN, self.morphologyKernel)
+            foregroundMask = cv2.dilate(foregroundMask, self.morphologyKernel, iterations=2)
+            contours = cv2.findContours(foregroundMask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)[-2]
+
+            for contour in contours:
+                if cv2.contourArea(contour) >= self.detectorMinArea:
+                    boxes.append(cv2.boundingRect(contour))
+
+        elif self.detectorType == "cascade":
+            grayImage = cv2.cvtColor(dataToSolve, cv2.COLOR_BGR2GRAY)
+
+            for box in self.detector.detectMultiScale(grayImage):
+                if int(box[2]) * int(box[3]) >= self.detectorMinArea:
+                    boxes.append(tuple(box))
+
+        else:
+            imageHeight, imageWidth = dataToSolve.shape[:2]
+            blob = cv2.dnn.blobFromImage(dataToSolve, self.detectorScale, self.detectorInputSize, self.detectorMean, swapRB=self.detectorSwapRB, crop=False)
+            self.detector.setInput(blob)
+
+            # SSD output: [image, class, confidence, left, top, right, bottom]
+            for detection in self.detector.forward().reshape(-1, 7):
+                if self.detectorClasses is not None and int(detection[1]) not in self.detectorClasses:
+                    continue
+
+                if float(detection[2]) >= self.detectorConfidence:
+                    leftX = max(0, int(detection[3] * imageWidth))
+                    topY = max(0, int(detection[4] * imageHeight))
+                    rightX = min(imageWidth, int(detection[5] * imageWidth))
+                    bottomY = min(imageHeight, int(detection[6] * imageHeight))
+
+                    if (rightX - leftX) * (bottomY - topY) >= self.detectorMinArea:
+                        boxes.append((leftX, topY, rightX - leftX, bottomY - topY))
+
+        return np.array(boxes, dtype=np.float64).reshape(-1, 4)
+
+
+class KalmanFilterBank:
+
+    # Supported motion models
+    motionModels = ['velocity', 'acceleration']
+
+    # Function: Constructor
+    def __init__(self, motionModel, processNoise, measurementNoise):
+
+        # State: center x, center y, width, height, their velocities and center acceleration
+        self.motionModel = motionModel
+
+        if self.motionModel == "acceleration":
+            self.stateSize = 10
+
+        else:
+            self.stateSize = 8
+
+        # Noise standard deviations relative to box height
+        self.processNoise = float(processNoise)
+        self.measurementNoise = float(measurementNoise)
+
+        # Measurement: center x, center y, width, height
+        self.measurementMatrix = np.zeros((4, self.stateSize), dtype=np.float64)
+        self.measurementMatrix[:4, :4] = np.eye(4)
+
+        # Build state arrays, one row per track
+        self.states = np.zeros((0, self.stateSize), dtype=np.float64)
+        self.covariances = np.zeros((0, self.stateSize, self.stateSize), dtype=np.float64)
+
+    # Function: getMeasurements
+    def getMeasurements(self, boxes):
+
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+
+        return np.stack([boxes[:, 0] + boxes[:, 2] / 2.0, boxes[:, 1] + boxes[:, 3] / 2.0, boxes[:, 2], boxes[:, 3]], axis=1)
+
+    # Function: getTransition
+    def getTransition(self, frameStep):
+
+        transitionMatrix = np.eye(self.stateSize, dtype=np.float64)
+        transitionMatrix[0:4, 4:8] = np.eye(4) * frameStep
+
+        if self.motionModel == "acceleration":
+            transitionMatrix[0:2, 8:10] = np.eye(2) * 0.5 * frameStep * frameStep
+            transitionMatrix[4:6, 8:10] = np.eye(2) * frameStep
+
+        return transitionMatrix
+
+    # Function: getDiagonal
+    def getDiagonal(self, standardDeviations):
+
+        # Batch of diagonal matrices from N x D standard deviations
+        diagonalMatrices = np.zeros(standardDeviations.shape + (standardDeviations.shape[1],), dtype=np.float64)
+        diagonalIndexes = np.arange(standardDeviations.shape[1])
+        diagonalMatrices[:, diagonalIndexes, diagonalIndexes] = standardDeviations * standardDeviations
+
+        return diagonalMatrices
+
+    # Function: getStateDeviations
+    def getStateDeviations(self, heights, noiseRatio):
+
+        # Position and size noise, velocity noise, acceleration noise scale with box height
+        noiseScales = np.array([1.0, 1.0, 1.0, 1.0, 0.125, 0.125, 0.125, 0.125, 0.0625, 0.0625][:self.stateSize])
+
+        return np.maximum(heights, 1.0)[:, None] * noiseRatio * noiseScales[None, :]
+
+    # Function: getInitialStates
+    def getInitialStates(self, boxes):
+
+        measurements = self.getMeasurements(boxes)
+
+        newStates = np.zeros((len(measurements), self.stateSize), dtype=np.float64)
+        newStates[:, :4] = measurements
+
+        # Unknown velocity starts with large uncertainty
+        newCovariances = self.getDiagonal(self.getStateDeviations(measurements[:, 3], self.measurementNoise) * 10.0)
+        newCovariances[:, :4, :4] = self.getDiagonal(self.getStateDeviations(measurements[:, 3], self.measurementNoise)[:, :4] * 2.0)
+
+        return newStates, newCovariances
+
+    # Function: add
+    def add(self, boxes):
+
+        newStates, newCovariances = self.getInitialStates(boxes)
+
+        self.states = np.vstack([self.states, newStates])
+        self.covariances = np.concatenate([self.covariances, newCovariances])
+
+    # Function: reset
+    def reset(self, rows, boxes):
+
+        if len(rows) == 0:
+            return
+
+        # Filters start again from new boxes
+        self.states[rows], self.covariances[rows] = self.getInitialStates(boxes)
+
+    # Function: remove
+    def remove(self, keepMask):
+
+        self.states = self.states[keepMask]
+        self.covariances = self.covariances[keepMask]
+
+    # Function: predict
+    def predict(self, rows, frameStep):
+
+        if len(rows) == 0:
+            return
+
+        transitionMatrix = self.getTransition(float(frameStep))
+        processCovariances = self.getDiagonal(self.getStateDeviations(self.states[rows, 3], self.processNoise)) * float(frameStep)
+
+        self.states[rows] = self.states[rows] @ transitionMatrix.T
+        self.covariances[rows] = transitionMatrix @ self.covariances[rows] @ transitionMatrix.T + processCovariances
+
+    # Function: update
+    def update(self, rows, boxes):
+
+        if len(rows) == 0:
+            return
+
+        measurements = self.getMeasurements(boxes)
+        covariances = self.covariances[rows]
+
+        # Batched Kalman gain: K = P H' (H P H' + R)^-1
+        covarianceMeasurement = covariances @ self.measurementMatrix.T
+        innovationCovariances = self.measurementMatrix @ covarianceMeasurement + self.getDiagonal(self.getStateDeviations(measurements[:, 3], self.measurementNoise)[:, :4])
+        kalmanGains = np.linalg.solve(innovationCovariances, covarianceMeasurement.transpose(0, 2, 1)).transpose(0, 2, 1)
+
+        innovations = measurements - self.states[rows] @ self.measurementMatrix.T
+
+        self.states[rows] = self.states[rows] + (kalmanGains @ innovations[:, :, None])[:, :, 0]
+        self.covariances[rows] = (np.eye(self.stateSize)[None, :, :] - kalmanGains @ self.measurementMatrix) @ covariances
+
+    # Function: getBoxes
+    def getBoxes(self, rows):
+
+        states = self.states[rows]
+
+        return np.stack([states[:, 0] - states[:, 2] / 2.0, states[:, 1] - states[:, 3] / 2.0, states[:, 2], states[:, 3]], axis=1).reshape(-1, 4)
+
+    # Function: getVelocities
+    def getVelocities(self, rows):
+
+        return self.states[rows, 4:6].reshape(-1, 2)
+
+
+class AppearanceGallery:
+
+    # Function: Constructor
+    def __init__(self, maxTargets, maxAge, matchThreshold, updateRate=0.2):
+
+        self.maxTargets = max(1, int(maxTargets))
+        self.maxAge = float(maxAge)
+        self.matchThreshold = float(matchThreshold)
+        self.updateRate = float(updateRate)
+
+        # Hue and saturation histogram bins, value is ignored for lighting changes
+        self.histogramBins = [16, 4]
+        self.histogramRanges = [0, 180, 0, 256]
+        descriptorSize = self.histogramBins[0] * self.histogramBins[1]
+
+        # Build gallery arrays, one row per known target
+        self.descriptors = np.zeros((0, descriptorSize), dtype=np.float32)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.colors = np.zeros((0, 3), dtype=np.int64)
+        self.lastSeen = np.zeros(0, dtype=np.float64)
+
+    # Function: getDescriptors
+    def getDescriptors(self, dataToSolve, boxes):
+
+        imageHeight, imageWidth = dataToSolve.shape[:2]
+        descriptors = np.zeros((len(boxes), self.descriptors.shape[1]), dtype=np.float32)
+
+        for boxIndex, box in enumerate(boxes):
+            x0 = max(0, int(box[0]))
+            y0 = max(0, int(box[1]))
+            x1 = min(imageWidth, int(box[0] + box[2]))
+            y1 = min(imageHeight, int(box[1] + box[3]))
+
+            # Box out of image has no appearance
+            if x1 <= x0 or y1 <= y0:
+                continue
+
+            targetHSV = cv2.cvtColor(dataToSolve[y0:y1, x0:x1], cv2.COLOR_BGR2HSV)
+            descriptors[boxIndex] = cv2.calcHist([targetHSV], [0, 1], None, self.histogramBins, self.histogramRanges).reshape(-1)
+
+        # Square root of normalized histograms, dot product is Bhattacharyya coefficient
+        descriptors = descriptors / np.maximum(descriptors.sum(axis=1, keepdims=True), 1.0)
+
+        return np.sqrt(descriptors)
+
+    # Function: update
+    def update(self, targetIDs, descriptors, colors):
+
+        currentTime = time.time()
+        galleryRows = {int(targetID): galleryRow for galleryRow, targetID in enumerate(self.ids)}
+        knownRows = np.array([galleryRows.get(int(targetID), -1) for targetID in targetIDs], dtype=np.int64)
+        knownTargets = knownRows >= 0
+
+        # Known targets follow slow appearance changes
+        if knownTargets.any():
+            rows = knownRows[knownTargets]
+            blendedDescriptors = (1.0 - self.updateRate) * self.descriptors[rows] + self.updateRate * descriptors[knownTargets]
+            self.descriptors[rows] = blendedDescriptors / np.maximum(np.linalg.norm(blendedDescriptors, axis=1, keepdims=True), 1e-6)
+            self.lastSeen[rows] = currentTime
+
+        newTargets = ~knownTargets
+
+        if newTargets.any():
+            self.descriptors = np.vstack([self.descriptors, descriptors[newTargets]])
+            self.ids = np.concatenate([self.ids, np.asarray(targetIDs, dtype=np.int64)[newTargets]])
+            self.colors = np.vstack([self.colors, np.asarray(colors, dtype=np.int64).reshape(-1, 3)[newTargets]])
+            self.lastSeen = np.concatenate([self.lastSeen, np.full(int(newTargets.sum()), currentTime)])
+
+        self.evict(currentTime)
+
+    # Function: evict
+    def evict(self, currentTime):
+
+        # Forget targets not seen for too long
+        keepMask = currentTime - self.lastSeen <= self.maxAge
+
+        # Least recently seen targets leave a full gallery
+        if keepMask.sum() > self.maxTargets:
+            keepMask[np.argsort(-self.lastSeen)[self.maxTargets:]] = False
+
+        if not keepMask.all():
+            self.descriptors = self.descriptors[keepMask]
+            self.ids = self.ids[keepMask]
+            self.colors = self.colors[keepMask]
+            self.lastSeen = self.lastSeen[keepMask]
+
+    # Function: match
+    def match(self, descriptors, excludedIDs, assignScores):
+
+        candidateRows = np.flatnonzero(~np.isin(self.ids, excludedIDs))
+
+        if len(candidateRows) == 0 or len(descriptors) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        # Every gallery target against every candidate region in one product
+        similarity = self.descriptors[candidateRows] @ descriptors.T
+
+        galleryRows, candidateColumns = assignScores(similarity, self.matchThreshold)
+
+        return candidateRows[galleryRows], candidateColumns
+
+    # Function: getColors
+    def getColors(self, targetIDs):
+
+        galleryRows = {int(targetID): galleryRow for galleryRow, targetID in enumerate(self.ids)}
+
+        return self.colors[[galleryRows[int(targetID)] for targetID in targetIDs]]
+
+
+class TrackStore:
+
+    # Track states
+    trackStates = ['TENTATIVE', 'CONFIRMED', 'LOST']
+
+    # Function: Constructor
+    def __init__(self, associationMethod, associationThreshold, confirmHits, maxMisses, maxLostAge, kalmanFilterBank, appearanceGallery):
+
+        # Build Halo spinner
+        self.systemResponse = Halo(spinner='dots')
+
+        # Optional motion model, rows aligned with track rows
+        self.kalmanFilterBank = kalmanFilterBank
+
+        # Optional appearance gallery, entries by track ID outlive tracks
+        self.appearanceGallery = appearanceGallery
+
+        self.associationThreshold = float(associationThreshold)
+        self.confirmHits = int(confirmHits)
+        self.maxMisses = int(maxMisses)
+        self.maxLostAge = int(maxLostAge)
+
+        # Hungarian assignment requires scipy, greedy assignment otherwise
+        self.associationMethod = "greedy"
+
+        if str(associationMethod) == "hungarian":
+            try:
+                from scipy.optimize import linear_sum_assignment
+                self.linearSumAssignment = linear_sum_assignment
+                self.associationMethod = "hungarian"
+
+            except:
+                systemResponseMessage = "\n[ERROR] Sorry, scipy not installed. Using greedy association.\n"
+                self.systemResponse.text_color = "red"
+                self.systemResponse.fail(systemResponseMessage)
+
+        # Build track arrays, one row per track
+        self.boxes = np.zeros((0, 4), dtype=np.float64)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.ages = np.zeros(0, dtype=np.int64)
+        self.hits = np.zeros(0, dtype=np.int64)
+        self.misses = np.zeros(0, dtype=np.int64)
+        self.states = np.zeros(0, dtype=np.int8)
+        self.colors = np.zeros((0, 3), dtype=np.int64)
+        self.velocities = np.zeros((0, 2), dtype=np.float64)
+
+        self.nextID = 1
+
+        # Tracks whose boxes were replaced by last detections, their trackers start again
+        self.reanchoredIDs = np.zeros(0, dtype=np.int64)
+
+    # Function: getIntersectionOverUnion
+    def getIntersectionOverUnion(self, boxesA, boxesB):
+
+        # Single precision halves memory traffic on large N x M matrices
+        boxesA = np.asarray(boxesA, dtype=np.float32).reshape(-1, 4)
+        boxesB = np.asarray(boxesB, dtype=np.float32).reshape(-1, 4)
+
+        # Boxes A as columns, boxes B as rows
+        leftA = boxesA[:, 0:1]
+        topA = boxesA[:, 1:2]
+        rightA = leftA + boxesA[:, 2:3]
+        bottomA = topA + boxesA[:, 3:4]
+
+        leftB = boxesB[:, 0]
+        topB = boxesB[:, 1]
+        rightB = leftB + boxesB[:, 2]
+        bottomB = topB + boxesB[:, 3]
+
+        # Intersection of every pair of boxes, N x M
+        intersectionWidth = np.minimum(rightA, rightB) - np.maximum(leftA, leftB)
+        intersectionHeight = np.minimum(bottomA, bottomB) - np.maximum(topA, topB)
+        np.maximum(intersectionWidth, 0, out=intersectionWidth)
+        np.maximum(intersectionHeight, 0, out=intersectionHeight)
+
+        intersectionArea = intersectionWidth
+        intersectionArea *= intersectionHeight
+
+        unionArea = (boxesA[:, 2:3] * boxesA[:, 3:4]) + (boxesB[:, 2] * boxesB[:, 3]) - intersectionArea
+        np.maximum(unionArea, np.float32(1e-9), out=unionArea)
+
+        intersectionOverUnion = intersectionArea
+        intersectionOverUnion /= unionArea
+
+        return intersectionOverUnion
+
+    # Function: associate
+    def associate(self, boxesA, boxesB):
+
+        if len(boxesA) == 0 or len(boxesB) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        return self.assignScores(self.getIntersectionOverUnion(boxesA, boxesB), self.associationThreshold)
+
+    # Function: assignScores
+    def assignScores(self, matchScores, scoreThreshold):
+
+        if matchScores.shape[0] == 0 or matchScores.shape[1] == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        # Optimal assignment
+        if self.associationMethod == "hungarian":
+            matchedRows, matchedColumns = self.linearSumAssignment(-matchScores)
+            matchedRows = np.asarray(matchedRows, dtype=np.int64)
+            matchedColumns = np.asarray(matchedColumns, dtype=np.int64)
+
+            # Discard assignments under threshold
+            validMatches = matchScores[matchedRows, matchedColumns] >= scoreThreshold
+
+            return matchedRows[validMatches], matchedColumns[validMatches]
+
+        # Greedy assignment, mutual best scores are matched each round
+        matchScores[matchScores < scoreThreshold] = 0
+        rowsIndex = np.arange(matchScores.shape[0])
+
+        matchedRows = []
+        matchedColumns = []
+
+        while True:
+            bestColumns = matchScores.argmax(axis=1)
+            bestRows = matchScores.argmax(axis=0)
+
+            mutualMatches = (bestRows[bestColumns] == rowsIndex) & (matchScores[rowsIndex, bestColumns] > 0)
+
+            if not mutualMatches.any():
+                break
+
+            roundRows = rowsIndex[mutualMatches]
+            roundColumns = bestColumns[mutualMatches]
+
+            matchedRows.append(roundRows)
+            matchedColumns.append(roundColumns)
+
+            # Matched items can not be assigned again
+            matchScores[roundRows, :] = 0
+            matchScores[:, roundColumns] = 0
+
+        if len(matchedRows) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        return np.concatenate(matchedRows).astype(np.int64), np.concatenate(matchedColumns).astype(np.int64)
+
+    # Function: addTracks
+    def addTracks(self, boxes, colors, trackState, trackIDs=None):
+
+        tracksNumber = len(boxes)
+
+        if tracksNumber == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        # Select random color to new tracks if not provided
+        if colors is None:
+            colors = np.random.randint(0, 256, size=(tracksNumber, 3))
+
+        # Re-identified tracks keep their IDs, new tracks get next ones
+        if trackIDs is not None:
+            newIDs = np.asarray(trackIDs, dtype=np.int64)
+
+        else:
+            newIDs = np.arange(self.nextID, self.nextID + tracksNumber, dtype=np.int64)
+            self.nextID = self.nextID + tracksNumber
+
+        self.boxes = np.vstack([self.boxes, np.asarray(boxes, dtype=np.float64).reshape(-1, 4)])
+        self.ids = np.concatenate([self.ids, newIDs])
+        self.ages = np.concatenate([self.ages, np.zeros(tracksNumber, dtype=np.int64)])
+        self.hits = np.concatenate([self.hits, np.zeros(tracksNumber, dtype=np.int64)])
+        self.misses = np.concatenate([self.misses, np.zeros(tracksNumber, dtype=np.int64)])
+        self.states = np.concatenate([self.states, np.full(tracksNumber, trackState, dtype=np.int8)])
+        self.colors = np.vstack([self.colors, np.asarray(colors, dtype=np.int64).reshape(-1, 3)])
+        self.velocities = np.vstack([self.velocities, np.zeros((tracksNumber, 2), dtype=np.float64)])
+
+        if self.kalmanFilterBank is not None:
+            self.kalmanFilterBank.add(boxes)
+
+        return newIDs
+
+    # Function: removeTracks
+    def removeTracks(self, removeMask):
+
+        keepMask = ~np.asarray(removeMask, dtype=bool)
+
+        self.boxes = self.boxes[keepMask]
+        self.ids = self.ids[keepMask]
+        self.ages = self.ages[keepMask]
+        self.hits = self.hits[keepMask]
+        self.misses = self.misses[keepMask]
+        self.states = self.states[keepMask]
+        self.colors = self.colors[keepMask]
+        self.velocities = self.velocities[keepMask]
+
+        if self.kalmanFilterBank is not None:
+            self.kalmanFilterBank.remove(keepMask)
+
+    # Function: getState
+    def getState(self):
+
+        # Copies of track arrays, safe to write while tracking goes on
+        trackState = {'boxes': self.boxes, 'ids': self.ids, 'ages': self.ages, 'hits': self.hits, 'misses': self.misses, 'states': self.states, 'colors': self.colors, 'velocities': self.velocities, 'nextID': np.array(self.nextID, dtype=np.int64)}
+
+        if self.kalmanFilterBank is not None:
+            trackState['kalmanStates'] = self.kalmanFilterBank.states
+            trackState['kalmanCovariances'] = self.kalmanFilterBank.covariances
+
+        return {stateName: np.array(stateValue) for stateName, stateValue in trackState.items()}
+
+    # Function: setState
+    def setState(self, trackState):
+
+        self.boxes = np.asarray(trackState['boxes'], dtype=np.float64).reshape(-1, 4)
+        self.ids = np.asarray(trackState['ids'], dtype=np.int64)
+        self.ages = np.asarray(trackState['ages'], dtype=np.int64)
+        self.hits = np.asarray(trackState['hits'], dtype=np.int64)
+        self.misses = np.asarray(trackState['misses'], dtype=np.int64)
+        self.states = np.asarray(trackState['states'], dtype=np.int8)
+        self.colors = np.asarray(trackState['colors'], dtype=np.int64).reshape(-1, 3)
+        self.velocities = np.asarray(trackState['velocities'], dtype=np.float64).reshape(-1, 2)
+        self.nextID = int(trackState['nextID'])
+
+        # Motion model state if saved with same model, fresh filters otherwise
+        if self.kalmanFilterBank is not None:
+
+            if 'kalmanStates' in trackState and trackState['kalmanStates'].shape == (len(self.boxes), self.kalmanFilterBank.stateSize):
+                self.kalmanFilterBank.states = np.asarray(trackState['kalmanStates'], dtype=np.float64)
+                self.kalmanFilterBank.covariances = np.asarray(trackState['kalmanCovariances'], dtype=np.float64)
+
+            else:
+                self.kalmanFilterBank.remove(np.zeros(len(self.kalmanFilterBank.states), dtype=bool))
+                self.kalmanFilterBank.add(self.boxes)
+
+    # Function: scaleTracks
+    def scaleTracks(self, scaleX, scaleY):
+
+        trackScale = np.array([scaleX, scaleY, scaleX, scaleY])
+
+        self.boxes = self.boxes * trackScale
+        self.velocities = self.velocities * trackScale[:2]
+
+        # Motion model starts again at new scale
+        if self.kalmanFilterBank is not None:
+            self.kalmanFilterBank.reset(np.arange(len(self.boxes)), self.boxes)
+
+    # Function: getActive
+    def getActive(self):
+
+        # Lost tracks have no tracker
+        return self.states != 2
+
+    # Function: getTrackerBoxes
+    def getTrackerBoxes(self):
+
+        return self.boxes[self.getActive()]
+
+    # Function: getTrackerIDs
+    def getTrackerIDs(self):
+
+        return self.ids[self.getActive()]
+
+    # Function: getTrackerVelocities
+    def getTrackerVelocities(self):
+
+        if self.kalmanFilterBank is None:
+            return self.velocities[self.getActive()]
+
+        return self.kalmanFilterBank.getVelocities(np.flatnonzero(self.getActive()))
+
+    # Function: getConfirmedTracks
+    def getConfirmedTracks(self):
+
+        confirmedTracks = self.states == 1
+        colors = [tuple(int(channel) for channel in color) for color in self.colors[confirmedTracks]]
+
+        # Smoothed boxes if motion model enabled
+        if self.kalmanFilterBank is not None:
+            boxes = self.kalmanFilterBank.getBoxes(np.flatnonzero(confirmedTracks))
+
+        else:
+            boxes = self.boxes[confirmedTracks]
+
+        return boxes, colors, self.ids[confirmedTracks]
+
+    # Function: getConfirmedVelocities
+    def getConfirmedVelocities(self):
+
+        confirmedTracks = self.states == 1
+
+        # Pixels per frame, box displacement without motion model
+        if self.kalmanFilterBank is None:
+            return self.velocities[confirmedTracks]
+
+        return self.kalmanFilterBank.getVelocities(np.flatnonzero(confirmedTracks))
+
+    # Function: getConfirmedConfidences
+    def getConfirmedConfidences(self):
+
+        # Tracked on last frame 1.0, missed 0.0
+        confirmedTracks = self.states == 1
+
+        return (self.misses[confirmedTracks] == 0).astype(np.float64)
+
+    # Function: predictTracked
+    def predictTracked(self, frameStep=1):
+
+        activeTracks = np.flatnonzero(self.getActive())
+
+        # Skipped frames follow motion model, or last box displacement without it
+        if self.kalmanFilterBank is not None:
+            self.kalmanFilterBank.predict(activeTracks, frameStep)
+            self.boxes[activeTracks] = self.kalmanFilterBank.getBoxes(activeTracks)
+
+        else:
+            self.boxes[activeTracks, :2] = self.boxes[activeTracks, :2] + self.velocities[activeTracks] * frameStep
+
+    # Function: updateTracked
+    def updateTracked(self, boxes, targetsSuccess, frameStep=1, skippedFrames=0):
+
+        activeTracks = np.flatnonzero(self.getActive())
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        targetsSuccess = np.asarray(targetsSuccess, dtype=bool)
+
+        # Tracker engine out of sync with track store
+        if len(activeTracks) != len(boxes):
+            return True
+
+        # Age lost tracks
+        lostTracks = self.states == 2
+        self.misses[lostTracks] = self.misses[lostTracks] + 1
+
+        # Update active tracks with tracker outputs
+        trackedTracks = activeTracks[targetsSuccess]
+        missedTracks = activeTracks[~targetsSuccess]
+
+        # Box displacement per frame since last tracked box, skipped frames were extrapolated from it
+        lastTrackedBoxes = self.boxes[trackedTracks, :2] - self.velocities[trackedTracks] * skippedFrames
+        self.velocities[trackedTracks] = (boxes[targetsSuccess, :2] - lastTrackedBoxes) / max(1, frameStep + skippedFrames)
+        self.velocities[missedTracks] = 0.0
+
+        self.boxes[trackedTracks] = boxes[targetsSuccess]
+
+        # Motion model predicts every active track, corrects tracked ones and fills missed ones
+        if self.kalmanFilterBank is not None:
+            self.kalmanFilterBank.predict(activeTracks, frameStep)
+            self.kalmanFilterBank.update(trackedTracks, boxes[targetsSuccess])
+            self.boxes[missedTracks] = self.kalmanFilterBank.getBoxes(missedTracks)
+
+        self.ages[activeTracks] = self.ages[activeTracks] + 1
+        self.hits[trackedTracks] = self.hits[trackedTracks] + 1
+        self.misses[trackedTracks] = 0
+        self.misses[missedTracks] = self.misses[missedTracks] + 1
+
+        # Tentative tracks are confirmed after enough tracked frames
+        self.states[(self.states == 0) & (self.hits >= self.confirmHits)] = 1
+
+        # Confirmed tracks are lost after too many misses
+        newLostTracks = (self.states == 1) & (self.misses > self.maxMisses)
+        self.states[newLostTracks] = 2
+
+        # Tentative tracks are deleted on first miss, lost tracks when too old
+        failedTracks = (self.states == 0) & (self.misses > 0)
+        expiredTracks = (self.states == 2) & (self.misses > self.maxMisses + self.maxLostAge)
+        self.removeTracks(failedTracks | expiredTracks)
+
+        return bool(newLostTracks.any() or failedTracks.any())
+
+    # Function: updateAppearance
+    def updateAppearance(self, dataToSolve):
+
+        # Confirmed targets tracked on this frame
+        trackedTracks = np.flatnonzero((self.states == 1) & (self.misses == 0))
+
+        if len(trackedTracks) > 0:
+            self.appearanceGallery.update(self.ids[trackedTracks], self.appearanceGallery.getDescriptors(dataToSolve, self.boxes[trackedTracks]), self.colors[trackedTracks])
+
+    # Function: reidentifyTargets
+    def reidentifyTargets(self, boxes, matchedRows, matchedColumns, replaceTracks, dataToSolve):
+
+        unmatchedColumns = np.setdiff1d(np.arange(len(boxes)), matchedColumns)
+
+        if len(unmatchedColumns) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        # Matched targets keep their IDs, tracked targets keep their boxes unless every target is selected again
+        excludedIDs = self.ids[matchedRows]
+
+        if int(replaceTracks) == 0:
+            excludedIDs = np.concatenate([excludedIDs, self.ids[self.getActive() & (self.misses == 0)]])
+
+        galleryRows, galleryColumns = self.appearanceGallery.match(self.appearanceGallery.getDescriptors(dataToSolve, boxes[unmatchedColumns]), excludedIDs, self.assignScores)
+
+        return self.appearanceGallery.ids[galleryRows], unmatchedColumns[galleryColumns]
+
+    # Function: updateDetections
+    def updateDetections(self, boxes, colors, confirmTracks, replaceTracks, dataToSolve=None):
+
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+
+        # Associate detections with every track, lost tracks are re-acquired with their IDs
+        matchedRows, matchedColumns = self.associate(self.boxes, boxes)
+
+        # Unmatched detections of known targets seen elsewhere get their IDs back
+        revivedIDs = np.zeros(0, dtype=np.int64)
+        revivedColumns = np.zeros(0, dtype=np.int64)
+
+        if self.appearanceGallery is not None and dataToSolve is not None:
+            reidentifiedIDs, reidentifiedColumns = self.reidentifyTargets(boxes, matchedRows, matchedColumns, replaceTracks, dataToSolve)
+
+            # Known IDs still in track store are re-anchored, forgotten ones are tracks again
+            trackRows = {int(trackID): trackRow for trackRow, trackID in enumerate(self.ids)}
+            reidentifiedRows = np.array([trackRows.get(int(trackID), -1) for trackID in reidentifiedIDs], dtype=np.int64)
+
+            matchedRows = np.concatenate([matchedRows, reidentifiedRows[reidentifiedRows >= 0]])
+            matchedColumns = np.concatenate([matchedColumns, reidentifiedColumns[reidentifiedRows >= 0]])
+
+            revivedIDs = reidentifiedIDs[reidentifiedRows < 0]
+            revivedColumns = reidentifiedColumns[reidentifiedRows < 0]
+
+        # Re-anchor missed or lost tracks, tracked boxes are kept
+        reanchoredRows = matchedRows[(self.misses[matchedRows] > 0) | (self.states[matchedRows] == 2)]
+        reanchoredColumns = matchedColumns[(self.misses[matchedRows] > 0) | (self.states[matchedRows] == 2)]
+
+        if int(replaceTracks) == 1:
+            reanchoredRows = matchedRows
+            reanchoredColumns = matchedColumns
+
+        self.boxes[reanchoredRows] = boxes[reanchoredColumns]
+        self.velocities[reanchoredRows] = 0.0
+        self.reanchoredIDs = self.ids[reanchoredRows]
+        self.misses[reanchoredRows] = 0
+
+        # Lost tracks motion is unknown, filters start again
+        if self.kalmanFilterBank is not None:
+            reanchoredLost = self.states[reanchoredRows] == 2
+            self.kalmanFilterBank.update(reanchoredRows[~reanchoredLost], boxes[reanchoredColumns[~reanchoredLost]])
+            self.kalmanFilterBank.reset(reanchoredRows[reanchoredLost], boxes[reanchoredColumns[reanchoredLost]])
+
+        self.states[reanchoredRows[self.states[reanchoredRows] == 2]] = 1
+
+        if int(confirmTracks) == 1:
+            self.states[matchedRows] = 1
+
+        rebuildTrackerEngine = len(reanchoredRows) > 0
+
+        # Unmatched tracks are lost when every target is selected again
+        if int(replaceTracks) == 1:
+            unmatchedTracks = np.ones(len(self.ids), dtype=bool)
+            unmatchedTracks[matchedRows] = False
+
+            rebuildTrackerEngine = rebuildTrackerEngine or bool((unmatchedTracks & self.getActive()).any())
+
+            # Lost age starts now
+            self.misses[unmatchedTracks & (self.states == 1)] = self.maxMisses + 1
+            self.states[unmatchedTracks & (self.states == 1)] = 2
+            self.removeTracks(unmatchedTracks & (self.states == 0))
+
+        # Re-identified targets already forgotten are confirmed tracks with their IDs and colors
+        if len(revivedIDs) > 0:
+            self.addTracks(boxes[revivedColumns], self.appearanceGallery.getColors(revivedIDs), 1, revivedIDs)
+            rebuildTrackerEngine = True
+
+        # Unmatched detections are new tracks
+        newDetections = np.ones(len(boxes), dtype=bool)
+        newDetections[matchedColumns] = False
+        newDetections[revivedColumns] = False
+
+        if colors is not None:
+            colors = np.asarray(colors, dtype=np.int64).reshape(-1, 3)[newDetections]
+
+        newIDs = self.addTracks(boxes[newDetections], colors, 1 if int(confirmTracks) == 1 else 0)
+
+        return bool(rebuildTrackerEngine or len(newIDs) > 0)
+
+
+class CascadeTracker:
+
+    # Function: Constructor
+    def __init__(self, trackerFactory, fastTrackerType, accurateTrackerType, anchorInterval, minConfidence, maxJump):
+
+        # Tracker factory builds OpenCV trackers by type
+        self.trackerFactory = trackerFactory
+        self.fastTrackerType = fastTrackerType
+        self.accurateTrackerType = accurateTrackerType
+
+        # Re-anchor policy
+        self.anchorInterval = max(1, int(anchorInterval))
+        self.minConfidence = float(minConfidence)
+        self.maxJump = float(maxJump)
+
+        # Counters
+        self.processedFrames = 0
+        self.anchorUpdates = 0
+
+    # Function: getTemplate
+    def getTemplate(self, dataToSolve, box):
+
+        leftX = max(0, int(box[0]))
+        topY = max(0, int(box[1]))
+        rightX = min(dataToSolve.shape[1], int(box[0] + box[2]))
+        bottomY = min(dataToSolve.shape[0], int(box[1] + box[3]))
+
+        if rightX - leftX < 2 or bottomY - topY < 2:
+            return None
+
+        # Small grayscale patch, comparison cost does not depend on box size
+        templatePatch = cv2.resize(dataToSolve[topY:bottomY, leftX:rightX], (16, 16), interpolation=cv2.INTER_AREA)
+
+        if templatePatch.ndim == 3:
+            templatePatch = cv2.cvtColor(templatePatch, cv2.COLOR_BGR2GRAY)
+
+        return templatePatch
+
+    # Function: getConfidence
+    def getConfidence(self, dataToSolve, box):
+
+        templatePatch = self.getTemplate(dataToSolve, box)
+
+        if templatePatch is None or self.anchorTemplate is None:
+            return 0.0
+
+        # Normalized cross correlation with last anchored appearance
+        return float(cv2.matchTemplate(templatePatch, self.anchorTemplate, cv2.TM_CCOEFF_NORMED)[0][0])
+
+    # Function: getOverlap
+    def getOverlap(self, box, otherBox):
+
+        overlapWidth = max(0.0, min(box[0] + box[2], otherBox[0] + otherBox[2]) - max(box[0], otherBox[0]))
+        overlapHeight = max(0.0, min(box[1] + box[3], otherBox[1] + otherBox[3]) - max(box[1], otherBox[1]))
+        overlapArea = overlapWidth * overlapHeight
+
+        return overlapArea / max(1e-9, box[2] * box[3] + otherBox[2] * otherBox[3] - overlapArea)
+
+    # Function: getWindow
+    def getWindow(self, dataToSolve, box):
+
+        # Search window, one box size of margin around trusted box
+        leftX = max(0, int(box[0] - box[2]))
+        topY = max(0, int(box[1] - box[3]))
+        rightX = min(dataToSolve.shape[1], int(box[0] + 2 * box[2]))
+        bottomY = min(dataToSolve.shape[0], int(box[1] + 2 * box[3]))
+
+        return leftX, topY, rightX, bottomY
+
+    # Function: trust
+    def trust(self, dataToSolve, box):
+
+        # Remember trusted box and its surroundings, accurate tracker restarts from here
+        self.box = tuple(int(round(float(value))) for value in box)
+        self.trustedWindow = self.getWindow(dataToSolve, self.box)
+        self.trustedPatch = dataToSolve[self.trustedWindow[1]:self.trustedWindow[3], self.trustedWindow[0]:self.trustedWindow[2]].copy()
+
+    # Function: anchor
+    def anchor(self, dataToSolve, box):
+
+        # Restart fast tracker on accurate box
+        self.trust(dataToSolve, box)
+        self.fastTracker = self.trackerFactory(self.fastTrackerType)
+        self.fastTracker.init(dataToSolve, self.box)
+        self.anchorTemplate = self.getTemplate(dataToSolve, self.box)
+        self.baselineConfidence = None
+
+    # Function: getAccurateBox
+    def getAccurateBox(self, dataToSolve):
+
+        leftX, topY, rightX, bottomY = self.trustedWindow
+        trustedBox = (self.box[0] - leftX, self.box[1] - topY, self.box[2], self.box[3])
+
+        # Accurate tracker initialized on last trusted frame, searches around last trusted box
+        accurateTracker = self.trackerFactory(self.accurateTrackerType)
+
+        try:
+            accurateTracker.init(self.trustedPatch, trustedBox)
+            accurateSuccess, accurateBox = accurateTracker.update(np.ascontiguousarray(dataToSolve[topY:bottomY, leftX:rightX]))
+        except:
+            return False, None
+
+        if not accurateSuccess:
+            return False, None
+
+        return True, (accurateBox[0] + leftX, accurateBox[1] + topY, accurateBox[2], accurateBox[3])
+
+    # Function: init, same contract as OpenCV trackers
+    def init(self, dataToSolve, box):
+
+        self.anchor(dataToSolve, box)
+
+        return True
+
+    # Function: update, same contract as OpenCV trackers
+    def update(self, dataToSolve):
+
+        self.processedFrames = self.processedFrames + 1
+
+        # Cheap tracker every frame
+        success, box = self.fastTracker.update(dataToSolve)
+
+        anchorRequired = not success or self.processedFrames % self.anchorInterval == 0
+        fastDrifted = not success
+
+        if success:
+
+            # Implausible jump, center moved more than max jump times box diagonal
+            previousDiagonal = max(1.0, float(np.hypot(self.box[2], self.box[3])))
+            centerJump = float(np.hypot((box[0] + box[2] / 2.0) - (self.box[0] + self.box[2] / 2.0), (box[1] + box[3] / 2.0) - (self.box[1] + self.box[3] / 2.0)))
+
+            # Confidence drop relative to confidence measured right after anchoring
+            confidence = self.getConfidence(dataToSolve, box)
+
+            if self.baselineConfidence is None:
+                self.baselineConfidence = confidence
+
+            fastDrifted = centerJump > self.maxJump * previousDiagonal
+            anchorRequired = anchorRequired or fastDrifted or confidence < self.minConfidence * self.baselineConfidence
+
+        # Expensive tracker only on drift
+        if anchorRequired:
+            accurateSuccess, accurateBox = self.getAccurateBox(dataToSolve)
+            self.anchorUpdates = self.anchorUpdates + 1
+
+            # Restarting a healthy fast tracker adds the accurate tracker error, re-anchor only when boxes disagree and accurate box matches anchored appearance better
+            if accurateSuccess and (fastDrifted or (self.getOverlap(box, accurateBox) < 0.5 and self.getConfidence(dataToSolve, accurateBox) > self.getConfidence(dataToSolve, box))):
+                self.anchor(dataToSolve, accurateBox)
+
+                return True, self.box
+
+        if success:
+            self.trust(dataToSolve, box)
+
+        return bool(success), self.box
+
+
+class ParallelTrackerEngine:
+
+    # Function: Constructor
+    def __init__(self, trackerPool):
+
+        # Shared thread pool, OpenCV releases the GIL while updating
+        self.trackerPool = trackerPool
+
+        # Build per-target trackers, track IDs, boxes and counters
+        self.trackers = []
+        self.targetIDs = []
+        self.boxes = []
+        self.updateTimes = []
+        self.updateSuccess = []
+
+    # Function: add, same contract as cv2.MultiTracker.add plus optional track ID
+    def add(self, tracker, dataToSolve, box, targetID=None):
+
+        success = tracker.init(dataToSolve, tuple(box))
+
+        # OpenCV 4.5+ init returns None
+        if success is None:
+            success = True
+
+        self.trackers.append(tracker)
+        self.targetIDs.append(None if targetID is None else int(targetID))
+        self.boxes.append(tuple(box))
+        self.updateTimes.append(0.0)
+        self.updateSuccess.append(bool(success))
+
+        return bool(success)
+
+    # Function: keepTargets
+    def keepTargets(self, targetIndexes):
+
+        self.trackers = [self.trackers[targetIndex] for targetIndex in targetIndexes]
+        self.targetIDs = [self.targetIDs[targetIndex] for targetIndex in targetIndexes]
+        self.boxes = [self.boxes[targetIndex] for targetIndex in targetIndexes]
+        self.updateTimes = [self.updateTimes[targetIndex] for targetIndex in targetIndexes]
+        self.updateSuccess = [self.updateSuccess[targetIndex] for targetIndex in targetIndexes]
+
+    # Function: removeTargets
+    def removeTargets(self, targetIDs):
+
+        removedIDs = set(int(targetID) for targetID in targetIDs)
+
+        self.keepTargets([targetIndex for targetIndex, targetID in enumerate(self.targetIDs) if targetID not in removedIDs])
+
+    # Function: sortTargets
+    def sortTargets(self, targetIDs):
+
+        targetIndexes = dict((targetID, targetIndex) for targetIndex, targetID in enumerate(self.targetIDs))
+
+        self.keepTargets([targetIndexes[int(targetID)] for targetID in targetIDs])
+
+    # Function: updateTarget
+    def updateTarget(self, targetIndex, dataToSolve):
+
+        startTime = time.perf_counter()
+        success, box = self.trackers[targetIndex].update(dataToSolve)
+
+        # Failed targets keep last known box
+        if success:
+            self.boxes[targetIndex] = tuple(box)
+
+        self.updateTimes[targetIndex] = time.perf_counter() - startTime
+        self.updateSuccess[targetIndex] = bool(success)
+
+        return bool(success)
+
+    # Function: update, same contract as cv2.MultiTracker.update
+    def update(self, dataToSolve):
+
+        # Avoid pool overhead with one target
+        if len(self.trackers) == 1:
+            results = [self.updateTarget(0, dataToSolve)]
+
+        else:
+            results = list(self.trackerPool.map(self.updateTarget, range(0, len(self.trackers)), [dataToSolve] * len(self.trackers)))
+
+        return all(results), self.getObjects()
+
+    # Function: getObjects, same contract as cv2.MultiTracker.getObjects
+    def getObjects(self):
+
+        return np.array(self.boxes, dtype=np.float64).reshape(-1, 4)
+
+    # Function: getStatistics
+    def getStatistics(self):
+
+        return list(self.updateTimes), list(self.updateSuccess)
+
+
+class RegionTrackerEngine(ParallelTrackerEngine):
+
+    # Function: Constructor
+    def __init__(self, trackerPool, regionPadding, regionMargin):
+
+        ParallelTrackerEngine.__init__(self, trackerPool)
+
+        # Search window: target box padded by padding times box size on every side
+        self.regionPadding = float(regionPadding)
+        self.regionMargin = float(regionMargin)
+
+        # Build per-target tracker factories and window index, windows as x, y, width, height
+        self.trackerFactories = []
+        self.targetWindows = []
+        self.windows = []
+
+        # Trackers are initialized inside windows once every target is added
+        self.pendingFrame = None
+
+        # Optional target velocities, pixels per frame, windows cover next expected position
+        self.targetVelocities = None
+
+    # Function: add, same contract as cv2.MultiTracker.add plus tracker factory and optional track ID
+    def add(self, tracker, dataToSolve, box, trackerFactory, targetID=None):
+
+        self.trackers.append(tracker)
+        self.trackerFactories.append(trackerFactory)
+        self.targetIDs.append(None if targetID is None else int(targetID))
+        self.boxes.append(tuple(box))
+        self.targetWindows.append(-1)
+        self.updateTimes.append(0.0)
+        self.updateSuccess.append(True)
+
+        self.pendingFrame = dataToSolve
+
+        return True
+
+    # Function: keepTargets
+    def keepTargets(self, targetIndexes):
+
+        ParallelTrackerEngine.keepTargets(self, targetIndexes)
+
+        self.trackerFactories = [self.trackerFactories[targetIndex] for targetIndex in targetIndexes]
+        self.targetWindows = [self.targetWindows[targetIndex] for targetIndex in targetIndexes]
+
+        # Velocities are set again before next update
+        self.targetVelocities = None
+
+        self.compactWindows()
+
+    # Function: getExpectedBox
+    def getExpectedBox(self, targetIndex):
+
+        box = self.boxes[targetIndex]
+
+        if self.targetVelocities is None or targetIndex >= len(self.targetVelocities):
+            return box
+
+        # Union of current box and box expected on next frame
+        velocityX, velocityY = self.targetVelocities[targetIndex]
+        leftX = min(box[0], box[0] + velocityX)
+        topY = min(box[1], box[1] + velocityY)
+
+        return (leftX, topY, box[2] + abs(velocityX), box[3] + abs(velocityY))
+
+    # Function: getWindow
+    def getWindow(self, box, imageWidth, imageHeight):
+
+        paddingX = box[2] * self.regionPadding
+        paddingY = box[3] * self.regionPadding
+
+        leftX = max(0, int(box[0] - paddingX))
+        topY = max(0, int(box[1] - paddingY))
+        rightX = min(imageWidth, int(np.ceil(box[0] + box[2] + paddingX)))
+        bottomY = min(imageHeight, int(np.ceil(box[1] + box[3] + paddingY)))
+
+        return [leftX, topY, max(1, rightX - leftX), max(1, bottomY - topY)]
+
+    # Function: buildWindows
+    def buildWindows(self, dataToSolve, targetIndexes, reuseTrackers):
+
+        imageHeight, imageWidth = dataToSolve.shape[:2]
+
+        # One window per target, overlapping windows are merged into one crop
+        groupWindows = []
+        groupTargets = []
+
+        for targetIndex in targetIndexes:
+            groupWindows.append(self.getWindow(self.getExpectedBox(targetIndex), imageWidth, imageHeight))
+            groupTargets.append([targetIndex])
+
+        windowsMerged = True
+
+        while windowsMerged:
+            windowsMerged = False
+
+            for windowIndex in range(0, len(groupWindows)):
+                for otherIndex in range(windowIndex + 1, len(groupWindows)):
+                    windowA = groupWindows[windowIndex]
+                    windowB = groupWindows[otherIndex]
+
+                    if windowA[0] < windowB[0] + windowB[2] and windowB[0] < windowA[0] + windowA[2] and windowA[1] < windowB[1] + windowB[3] and windowB[1] < windowA[1] + windowA[3]:
+                        leftX = min(windowA[0], windowB[0])
+                        topY = min(windowA[1], windowB[1])
+                        groupWindows[windowIndex] = [leftX, topY, max(windowA[0] + windowA[2], windowB[0] + windowB[2]) - leftX, max(windowA[1] + windowA[3], windowB[1] + windowB[3]) - topY]
+                        groupTargets[windowIndex] = groupTargets[windowIndex] + groupTargets[otherIndex]
+
+                        del groupWindows[otherIndex]
+                        del groupTargets[otherIndex]
+
+                        windowsMerged = True
+                        break
+
+                if windowsMerged:
+                    break
+
+        # Initialize trackers in window coordinates
+        for window, targets in zip(groupWindows, groupTargets):
+            windowIndex = len(self.windows)
+            self.windows.append(window)
+            windowFrame = dataToSolve[window[1]:window[1] + window[3], window[0]:window[0] + window[2]]
+
+            for targetIndex in targets:
+                box = self.boxes[targetIndex]
+
+                if not reuseTrackers:
+                    self.trackers[targetIndex] = self.trackerFactories[targetIndex]()
+
+                self.trackers[targetIndex].init(windowFrame, (int(round(box[0] - window[0])), int(round(box[1] - window[1])), int(round(box[2])), int(round(box[3]))))
+                self.targetWindows[targetIndex] = windowIndex
+
+    # Function: updateTarget
+    def updateTarget(self, targetIndex, dataToSolve):
+
+        startTime = time.perf_counter()
+
+        # Track inside search window only
+        window = self.windows[self.targetWindows[targetIndex]]
+        windowFrame = dataToSolve[window[1]:window[1] + window[3], window[0]:window[0] + window[2]]
+
+        success, box = self.trackers[targetIndex].update(windowFrame)
+
+        # Map box back into frame coordinates, failed targets keep last known box
+        if success:
+            self.boxes[targetIndex] = (box[0] + window[0], box[1] + window[1], box[2], box[3])
+
+        self.updateTimes[targetIndex] = time.perf_counter() - startTime
+        self.updateSuccess[targetIndex] = bool(success)
+
+        return bool(success)
+
+    # Function: update, same contract as cv2.MultiTracker.update
+    def update(self, dataToSolve):
+
+        # First update builds windows of added targets on frame they were added on
+        if self.pendingFrame is not None:
+            self.buildWindows(self.pendingFrame, [targetIndex for targetIndex in range(0, len(self.trackers)) if self.targetWindows[targetIndex] < 0], True)
+            self.pendingFrame = None
+
+        success, boxes = ParallelTrackerEngine.update(self, dataToSolve)
+
+        # Re-center windows whose targets get close to window border
+        movedWindows = set()
+        borderTargets = set()
+
+        for targetIndex in range(0, len(self.boxes)):
+            box = self.getExpectedBox(targetIndex)
+            window = self.windows[self.targetWindows[targetIndex]]
+            marginX = box[2] * self.regionMargin
+            marginY = box[3] * self.regionMargin
+
+            nearBorderX = (box[0] - window[0] < marginX and window[0] > 0) or (window[0] + window[2] - box[0] - box[2] < marginX and window[0] + window[2] < dataToSolve.shape[1])
+            nearBorderY = (box[1] - window[1] < marginY and window[1] > 0) or (window[1] + window[3] - box[1] - box[3] < marginY and window[1] + window[3] < dataToSolve.shape[0])
+
+            if nearBorderX or nearBorderY:
+                movedWindows.add(self.targetWindows[targetIndex])
+                borderTargets.add(targetIndex)
+
+        movedTargets = []
+
+        for windowIndex in movedWindows:
+            windowTargets = [targetIndex for targetIndex in range(0, len(self.trackers)) if self.targetWindows[targetIndex] == windowIndex]
+
+            # Windows slide along with their targets, trackers keep their models
+            if self.translateWindow(windowIndex, windowTargets, dataToSolve.shape[1], dataToSolve.shape[0]):
+                continue
+
+            # Targets leaving a shared window get new windows, targets staying keep theirs
+            leavingTargets = [targetIndex for targetIndex in windowTargets if targetIndex in borderTargets]
+
+            if len(leavingTargets) == len(windowTargets):
+                movedTargets.extend(windowTargets)
+
+            else:
+                movedTargets.extend(leavingTargets)
+
+        # Only trackers moved to new windows are initialized again
+        if len(movedTargets) > 0:
+            self.buildWindows(dataToSolve, movedTargets, False)
+            self.compactWindows()
+
+        return success, self.getObjects()
+
+    # Function: translateWindow
+    def translateWindow(self, windowIndex, targetIndexes, imageWidth, imageHeight):
+
+        boxes = np.array([self.getExpectedBox(targetIndex) for targetIndex in targetIndexes], dtype=np.float64)
+        window = self.windows[windowIndex]
+
+        # Union of window targets, margins relative to smallest target
+        leftX = boxes[:, 0].min()
+        topY = boxes[:, 1].min()
+        unionWidth = (boxes[:, 0] + boxes[:, 2]).max() - leftX
+        unionHeight = (boxes[:, 1] + boxes[:, 3]).max() - topY
+        marginX = boxes[:, 2].min() * self.regionMargin
+        marginY = boxes[:, 3].min() * self.regionMargin
+
+        # Targets and margins do not fit in window anymore
+        if unionWidth + 2 * marginX > window[2] or unionHeight + 2 * marginY > window[3]:
+            return False
+
+        # Shift towards targets center by at most one margin, trackers see it as a small target motion
+        shiftX = float(np.clip(leftX + unionWidth / 2.0 - (window[0] + window[2] / 2.0), -marginX, marginX))
+        shiftY = float(np.clip(topY + unionHeight / 2.0 - (window[1] + window[3] / 2.0), -marginY, marginY))
+
+        # Window keeps its size and stays inside frame
+        leftX = int(round(min(max(0.0, window[0] + shiftX), imageWidth - window[2])))
+        topY = int(round(min(max(0.0, window[1] + shiftY), imageHeight - window[3])))
+
+        self.windows[windowIndex] = [leftX, topY, window[2], window[3]]
+
+        return True
+
+    # Function: compactWindows
+    def compactWindows(self):
+
+        # Drop windows no target uses anymore, targets added since last update have none yet
+        usedWindows = sorted(set(windowIndex for windowIndex in self.targetWindows if windowIndex >= 0))
+        windowIndexes = dict((windowIndex, newIndex) for newIndex, windowIndex in enumerate(usedWindows))
+
+        self.windows = [self.windows[windowIndex] for windowIndex in usedWindows]
+        self.targetWindows = [windowIndexes.get(windowIndex, -1) for windowIndex in self.targetWindows]
+
+
+class TrackSnapshot:
+
+    # Function: Constructor
+    def __init__(self, snapshotFile, snapshotInterval, snapshotMaxAge, trackerType):
+
+        # Build Halo spinner
+        self.systemResponse = Halo(spinner='dots')
+
+        self.snapshotFile = str(snapshotFile)
+        self.snapshotInterval = float(snapshotInterval)
+        self.snapshotMaxAge = float(snapshotMaxAge)
+        self.trackerType = str(trackerType)
+
+        snapshotDirectory = os.path.dirname(os.path.abspath(self.snapshotFile))
+
+        if not os.path.isdir(snapshotDirectory):
+            os.makedirs(snapshotDirectory)
+
+        # Snapshots are encoded and written by a background thread, one at a time
+        self.snapshotWriter = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.snapshotFuture = None
+        self.lastSnapshotTime = time.perf_counter()
+
+        # Restore once on first frame
+        self.restorePending = 1
+
+    # Function: isDue
+    def isDue(self):
+
+        # Skip while previous snapshot is still being written
+        if self.snapshotFuture is not None and not self.snapshotFuture.done():
+            return False
+
+        return time.perf_counter() - self.lastSnapshotTime >= self.snapshotInterval
+
+    # Function: save
+    def save(self, trackState, dataToSolve):
+
+        self.lastSnapshotTime = time.perf_counter()
+
+        # Copy, frame is drawn and reused by tracking thread
+        self.snapshotFuture = self.snapshotWriter.submit(self.writeSnapshot, trackState, dataToSolve.copy(), time.time())
+
+    # Function: writeSnapshot
+    def writeSnapshot(self, trackState, snapshotFrame, snapshotTime):
+
+        try:
+            # Appearance models are learned again from this frame on restore
+            success, encodedFrame = cv2.imencode('.jpg', snapshotFrame, [int(cv2.IMWRITE_JPEG_QUALITY), 95])
+
+            snapshotData = dict(trackState)
+            snapshotData['frame'] = encodedFrame.reshape(-1)
+            snapshotData['timestamp'] = np.array(snapshotTime, dtype=np.float64)
+            snapshotData['trackerType'] = np.array(self.trackerType)
+
+            # Write then rename, a crash never leaves a broken snapshot
+            temporaryFile = self.snapshotFile + ".tmp.npz"
+            np.savez(temporaryFile, **snapshotData)
+            os.replace(temporaryFile, self.snapshotFile)
+
+        except:
+            systemResponseMessage = "\n[ERROR] Sorry, snapshot could not be written in " + self.snapshotFile + ".\n"
+            self.systemResponse.text_color = "red"
+            self.systemResponse.fail(systemResponseMessage)
+
+    # Function: load
+    def load(self):
+
+        if not os.path.isfile(self.snapshotFile):
+            return None
+
+        try:
+            with np.load(self.snapshotFile) as snapshotData:
+                snapshotAge = time.time() - float(snapshotData['timestamp'])
+                snapshotTrackerType = str(snapshotData['trackerType'])
+                snapshotFrame = cv2.imdecode(snapshotData['frame'], cv2.IMREAD_COLOR)
+                trackState = {stateName: snapshotData[stateName] for stateName in snapshotData.files if stateName not in ['frame', 'timestamp', 'trackerType']}
+
+        except:
+            systemResponseMessage = "\n[ERROR] Sorry, snapshot " + self.snapshotFile + " could not be read.\n"
+            self.systemResponse.text_color = "red"
+            self.systemResponse.fail(systemResponseMessage)
+            return None
+
+        # Old snapshots describe a scene that has moved on
+        if self.snapshotMaxAge > 0 and snapshotAge > self.snapshotMaxAge:
+            systemResponseMessage = "\n[INFO] Snapshot is " + str(int(snapshotAge)) + " s old, targets must be selected again.\n"
+            self.systemResponse.text_color = "yellow"
+            self.systemResponse.warn(systemResponseMessage)
+            return None
+
+        if snapshotTrackerType != self.trackerType:
+            systemResponseMessage = "\n[INFO] Snapshot taken with " + snapshotTrackerType + " tracker, resuming with " + self.trackerType + ".\n"
+            self.systemResponse.text_color = "yellow"
+            self.systemResponse.warn(systemResponseMessage)
+
+        return trackState, snapshotFrame
+
+    # Function: close
+    def close(self):
+
+        self.snapshotWriter.shutdown(wait=True)
+
+
+class FrameRecorder:
+
+    # Function: Constructor
+    def __init__(self, recordPath, chunkFrames, compression, maxChunkBuffers=2):
+
+        # Build Halo spinner
+        self.systemResponse = Halo(spinner='dots')
+
+        self.recordPath = str(recordPath)
+        self.chunkFrames = max(1, int(chunkFrames))
+        self.compression = int(compression)
+
+        # Fixed pool of chunk buffers: one being filled, others being written
+        self.maxChunkBuffers = max(2, int(maxChunkBuffers))
+        self.freeChunkBuffers = []
+        self.allocatedChunkBuffers = 0
+        self.chunkBufferCondition = threading.Condition()
+
+        # Recording waits for writer instead of growing memory, waits are counted
+        self.blockedChunks = 0
+        self.blockedTime = 0.0
+
+        if not os.path.isdir(self.recordPath):
+            os.makedirs(self.recordPath)
+
+        # Frames are buffered in one preallocated chunk, written by a background thread
+        self.chunkBuffer = None
+        self.chunkCount = 0
+        self.chunkIndex = 0
+        self.chunkWriter = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+        # Manifest data of chunk being filled: frame timestamps and target selections
+        self.timestamps = []
+        self.selections = []
+        self.recordedFrames = 0
+        self.recordedSelections = 0
+
+        # Manifest has one line per written chunk, appended after its chunk
+        self.manifestFile = os.path.join(self.recordPath, "manifest.jsonl")
+        open(self.manifestFile, 'w').close()
+
+        systemResponseMessage = "\n[INFO] Recording frames in " + self.recordPath + ".\n"
+        self.systemResponse.text_color = "blue"
+        self.systemResponse.info(systemResponseMessage)
+
+    # Function: record
+    def record(self, dataToRecord, timestamp):
+
+        # New chunk when full or when frame size changes
+        if self.chunkBuffer is not None and (self.chunkCount == self.chunkFrames or self.chunkBuffer.shape[1:] != dataToRecord.shape or self.chunkBuffer.dtype != dataToRecord.dtype):
+            self.flush()
+
+        if self.chunkBuffer is None:
+            self.chunkBuffer = self.getChunkBuffer(dataToRecord.shape, dataToRecord.dtype)
+            self.chunkCount = 0
+
+        # Copy, input buffers are reused by capture sources
+        self.chunkBuffer[self.chunkCount] = dataToRecord
+        self.chunkCount = self.chunkCount + 1
+
+        self.timestamps.append(float(timestamp))
+        self.recordedFrames = self.recordedFrames + 1
+
+    # Function: getChunkBuffer
+    def getChunkBuffer(self, frameShape, frameType):
+
+        chunkShape = (self.chunkFrames,) + tuple(frameShape)
+        waitStart = None
+
+        with self.chunkBufferCondition:
+
+            while True:
+
+                # Reuse a written buffer, buffers of another frame size are freed
+                while len(self.freeChunkBuffers) > 0:
+                    chunkBuffer = self.freeChunkBuffers.pop()
+
+                    if chunkBuffer.shape == chunkShape and chunkBuffer.dtype == frameType:
+                        break
+
+                    chunkBuffer = None
+                    self.allocatedChunkBuffers = self.allocatedChunkBuffers - 1
+
+                else:
+                    chunkBuffer = None
+
+                    if self.allocatedChunkBuffers < self.maxChunkBuffers:
+                        self.allocatedChunkBuffers = self.allocatedChunkBuffers + 1
+                        chunkBuffer = np.empty(chunkShape, dtype=frameType)
+
+                if chunkBuffer is not None:
+                    break
+
+                # Writer is behind capture, wait for a written chunk
+                if waitStart is None:
+                    waitStart = time.perf_counter()
+                    self.blockedChunks = self.blockedChunks + 1
+
+                self.chunkBufferCondition.wait()
+
+        if waitStart is not None:
+            self.blockedTime = self.blockedTime + time.perf_counter() - waitStart
+
+        return chunkBuffer
+
+    # Function: recordSelection
+    def recordSelection(self, boxes, colors):
+
+        # Selection made on last recorded frame
+        self.recordedSelections = self.recordedSelections + 1
+        self.selections.append({'frame': self.recordedFrames - 1, 'boxes': [[int(value) for value in box] for box in boxes], 'colors': [[int(channel) for channel in color] for color in colors]})
+
+    # Function: flush
+    def flush(self):
+
+        if self.chunkBuffer is None or self.chunkCount == 0:
+            return
+
+        if self.compression == 1:
+            chunkFile = "chunk-" + str(self.chunkIndex).zfill(6) + ".npz"
+
+        else:
+            chunkFile = "chunk-" + str(self.chunkIndex).zfill(6) + ".npy"
+
+        # Manifest line of this chunk only, written after its chunk so it never references missing chunks
+        manifest = {'version': 2, 'file': chunkFile, 'frames': self.chunkCount, 'timestamps': self.timestamps, 'selections': self.selections}
+
+        self.chunkWriter.submit(self.writeChunk, chunkFile, self.chunkBuffer, self.chunkCount, manifest)
+
+        self.chunkBuffer = None
+        self.chunkCount = 0
+        self.chunkIndex = self.chunkIndex + 1
+        self.timestamps = []
+        self.selections = []
+
+    # Function: writeChunk
+    def writeChunk(self, chunkFile, chunkBuffer, chunkCount, manifest):
+
+        chunkFrames = chunkBuffer[:chunkCount]
+
+        try:
+            # Compressed chunks are smaller, raw chunks can be memory-mapped
+            if self.compression == 1:
+                np.savez_compressed(os.path.join(self.recordPath, chunkFile), frames=chunkFrames)
+
+            else:
+                np.save(os.path.join(self.recordPath, chunkFile), chunkFrames)
+
+            with open(self.manifestFile, 'a') as manifestData:
+                manifestData.write(json.dumps(manifest) + "\n")
+
+        except:
+            systemResponseMessage = "\n[ERROR] Sorry, recording chunk " + str(chunkFile) + " could not be written.\n"
+            self.systemResponse.text_color = "red"
+            self.systemResponse.fail(systemResponseMessage)
+
+        # Written buffer is free for next chunk
+        with self.chunkBufferCondition:
+            self.freeChunkBuffers.append(chunkBuffer)
+            self.chunkBufferCondition.notify_all()
+
+    # Function: close
+    def close(self):
+
+        self.flush()
+        self.chunkWriter.shutdown(wait=True)
+
+        systemResponseMessage = "\n[INFO] Recording done: " + str(self.recordedFrames) + " frames, " + str(self.recordedSelections) + " selections saved in " + self.recordPath + ". Waited " + str(round(self.blockedTime, 2)) + " s for " + str(self.blockedChunks) + " chunks behind writer.\n"
+        self.systemResponse.text_color = "green"
+        self.systemResponse.succeed(systemResponseMessage)
+
+
+class TrajectorySink:
+
+    # Columns of every part, boxes are x, y, width, height
+    columnTypes = {'timestamp': np.float64, 'frame': np.int64, 'id': np.int64, 'box': np.float32, 'segments': np.float64}
+    columnShapes = {'timestamp': (), 'frame': (), 'id': (), 'box': (4,), 'segments': (5,)}
+
+    # Fixed .npy header size, row count is rewritten in place on every append
+    headerSize = 128
+
+    # Function: Constructor
+    def __init__(self, trajectoriesPath, flushRows, flushInterval, rotateRows, rotateInterval):
+
+        # Build Halo spinner
+        self.systemResponse = Halo(spinner='dots')
+
+        self.trajectoriesPath = str(trajectoriesPath)
+        self.flushRows = max(1, int(flushRows))
+        self.flushInterval = float(flushInterval)
+        self.rotateRows = max(1, int(rotateRows))
+        self.rotateInterval = float(rotateInterval)
+
+        if not os.path.isdir(self.trajectoriesPath):
+            os.makedirs(self.trajectoriesPath)
+
+        # In memory batch, written by a background thread
+        self.batchTimestamps = []
+        self.batchFrames = []
+        self.batchIDs = []
+        self.batchBoxes = []
+        self.batchRows = 0
+        self.lastFlushTime = time.perf_counter()
+        self.batchWriter = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+        # Current part, rotated by rows and age
+        # Track IDs restart every run, queries select one run
+        self.runName = datetime.datetime.now().strftime("%Y%m%d-%H%M%S") + "-" + str(os.getpid())
+        self.partName = None
+        self.partRows = 0
+        self.partStartTime = 0.0
+        self.partIndex = 0
+        self.recordedRows = 0
+
+        # Part files, only used by writer thread
+        self.columnFiles = {}
+        self.columnFilesPart = None
+        self.partManifest = None
+
+        systemResponseMessage = "\n[INFO] Saving trajectories in " + self.trajectoriesPath + ".\n"
+        self.systemResponse.text_color = "blue"
+        self.systemResponse.info(systemResponseMessage)
+
+    # Function: record
+    def record(self, frameIndex, timestamp, targetIDs, boxes):
+
+        if len(targetIDs) > 0:
+            self.batchTimestamps.append(np.full(len(targetIDs), float(timestamp)))
+            self.batchFrames.append(np.full(len(targetIDs), int(frameIndex), dtype=np.int64))
+            self.batchIDs.append(np.asarray(targetIDs, dtype=np.int64))
+            self.batchBoxes.append(np.asarray(boxes, dtype=np.float32).reshape(-1, 4))
+            self.batchRows = self.batchRows + len(targetIDs)
+
+        # Flush by size or time, whichever comes first
+        if self.batchRows >= self.flushRows or (self.batchRows > 0 and time.perf_counter() - self.lastFlushTime >= self.flushInterval):
+            self.flush()
+
+    # Function: flush
+    def flush(self):
+
+        self.lastFlushTime = time.perf_counter()
+
+        if self.batchRows == 0:
+            return
+
+        # New part when current one is full or old
+        if self.partName is None or self.partRows + self.batchRows > self.rotateRows or time.time() - self.partStartTime >= self.rotateInterval:
+            self.partName = "part-" + self.runName + "-" + str(self.partIndex).zfill(6)
+            self.partRows = 0
+            self.partStartTime = time.time()
+            self.partIndex = self.partIndex + 1
+
+        batch = (np.concatenate(self.batchTimestamps), np.concatenate(self.batchFrames), np.concatenate(self.batchIDs), np.concatenate(self.batchBoxes))
+
+        self.batchWriter.submit(self.writeBatch, self.partName, batch)
+
+        self.partRows = self.partRows + self.batchRows
+        self.recordedRows = self.recordedRows + self.batchRows
+
+        self.batchTimestamps = []
+        self.batchFrames = []
+        self.batchIDs = []
+        self.batchBoxes = []
+        self.batchRows = 0
+
+    # Function: writeHeader
+    def writeHeader(self, columnFile, columnName, rowsNumber):
+
+        header = "{'descr': " + repr(np.lib.format.dtype_to_descr(np.dtype(self.columnTypes[columnName]))) + ", 'fortran_order': False, 'shape': " + repr((int(rowsNumber),) + self.columnShapes[columnName]) + ", }"
+        header = header.ljust(self.headerSize - 11) + "\n"
+
+        columnFile.seek(0)
+        columnFile.write(b'\x93NUMPY\x01\x00' + np.array(len(header), dtype='<u2').tobytes() + header.encode('latin1'))
+
+    # Function: openPart
+    def openPart(self, partName):
+
+        self.closePart()
+
+        partPath = os.path.join(self.trajectoriesPath, partName)
+        os.makedirs(partPath)
+
+        # Empty columns, valid .npy files from the start
+        for columnName in self.columnTypes:
+            columnFile = open(os.path.join(partPath, columnName + ".npy"), 'w+b')
+            self.writeHeader(columnFile, columnName, 0)
+            self.columnFiles[columnName] = [columnFile, 0]
+
+        self.columnFilesPart = partName
+        self.partManifest = {'version': 1, 'run': self.runName, 'rows': 0, 'start': None, 'end': None}
+
+    # Function: appendColumn
+    def appendColumn(self, columnName, values):
+
+        columnFile, rowsNumber = self.columnFiles[columnName]
+
+        # Data first, then row count, readers never see missing rows
+        columnFile.seek(0, os.SEEK_END)
+        columnFile.write(np.ascontiguousarray(values, dtype=self.columnTypes[columnName]).tobytes())
+
+        rowsNumber = rowsNumber + len(values)
+        self.writeHeader(columnFile, columnName, rowsNumber)
+        columnFile.flush()
+
+        self.columnFiles[columnName][1] = rowsNumber
+
+    # Function: writeBatch
+    def writeBatch(self, partName, batch):
+
+        try:
+            if partName != self.columnFilesPart:
+                self.openPart(partName)
+
+            timestamps, frames, targetIDs, boxes = batch
+
+            # Rows grouped by target within batch, each target path is one contiguous slice
+            batchOrder = np.lexsort((timestamps, targetIDs))
+            timestamps = timestamps[batchOrder]
+            frames = frames[batchOrder]
+            targetIDs = targetIDs[batchOrder]
+            boxes = boxes[batchOrder]
+
+            segmentIDs, segmentStarts, segmentCounts = np.unique(targetIDs, return_index=True, return_counts=True)
+
+            # Segment index: target ID, first row, rows, first and last timestamp
+            firstRow = self.columnFiles['timestamp'][1]
+            segments = np.column_stack([segmentIDs, firstRow + segmentStarts, segmentCounts, timestamps[segmentStarts], timestamps[segmentStarts + segmentCounts - 1]])
+
+            self.appendColumn('timestamp', timestamps)
+            self.appendColumn('frame', frames)
+            self.appendColumn('id', targetIDs)
+            self.appendColumn('box', boxes)
+            self.appendColumn('segments', segments)
+
+            # Part manifest lets queries skip parts out of time range
+            self.partManifest['rows'] = self.columnFiles['timestamp'][1]
+            self.partManifest['start'] = float(timestamps.min()) if self.partManifest['start'] is None else min(self.partManifest['start'], float(timestamps.min()))
+            self.partManifest['end'] = float(timestamps.max()) if self.partManifest['end'] is None else max(self.partManifest['end'], float(timestamps.max()))
+
+            manifestFile = os.path.join(self.trajectoriesPath, partName, "manifest.json")
+
+            with open(manifestFile + ".tmp", 'w') as manifestData:
+                json.dump(self.partManifest, manifestData)
+
+            os.replace(manifestFile + ".tmp", manifestFile)
+
+        except:
+            systemResponseMessage = "\n[ERROR] Sorry, trajectories could not be written in " + str(partName) + ".\n"
+            self.systemResponse.text_color = "red"
+            self.systemResponse.fail(systemResponseMessage)
+
+    # Function: closePart
+    def closePart(self):
+
+        for columnFile, rowsNumber in self.columnFiles.values():
+            columnFile.close()
+
+        self.columnFiles = {}
+        self.columnFilesPart = None
+
+    # Function: close
+    def close(self):
+
+        self.flush()
+        self.batchWriter.shutdown(wait=True)
+        self.closePart()
+
+        systemResponseMessage = "\n[INFO] Trajectories done: " + str(self.recordedRows) + " boxes in " + str(self.partIndex) + " parts saved in " + self.trajectoriesPath + ".\n"
+        self.systemResponse.text_color = "green"
+        self.systemResponse.succeed(systemResponseMessage)
+
+
+class TrajectoryReader:
+
+    # Function: Constructor
+    def __init__(self, trajectoriesPath):
+
+        self.trajectoriesPath = str(trajectoriesPath)
+
+    # Function: getParts
+    def getParts(self, startTime, endTime, runName=None):
+
+        parts = []
+
+        if not os.path.isdir(self.trajectoriesPath):
+            return parts
+
+        for partName in sorted(os.listdir(self.trajectoriesPath)):
+            manifestFile = os.path.join(self.trajectoriesPath, partName, "manifest.json")
+
+            if not partName.startswith("part-") or not os.path.isfile(manifestFile):
+                continue
+
+            with open(manifestFile, 'r') as manifestData:
+                manifest = json.load(manifestData)
+
+            # Skip parts out of time range without opening them
+            if manifest['start'] is None or (startTime is not None and manifest['end'] < startTime) or (endTime is not None and manifest['start'] > endTime):
+                continue
+
+            if runName is not None and manifest['run'] != runName:
+                continue
+
+            parts.append((partName, manifest))
+
+        return parts
+
+    # Function: getRuns
+    def getRuns(self, startTime=None, endTime=None):
+
+        # Runs with boxes in time range and their first and last timestamp
+        runs = {}
+
+        for partName, manifest in self.getParts(startTime, endTime):
+            runStart, runEnd = runs.get(manifest['run'], (manifest['start'], manifest['end']))
+            runs[manifest['run']] = (min(runStart, manifest['start']), max(runEnd, manifest['end']))
+
+        return runs
+
+    # Function: getTrajectory
+    def getTrajectory(self, targetID, startTime=None, endTime=None, runName=None):
+
+        parts = self.getParts(startTime, endTime, runName)
+
+        # Same ID in another run is another target
+        partRuns = sorted(set(manifest['run'] for partName, manifest in parts))
+
+        if runName is None and len(partRuns) > 1:
+            raise ValueError("time range spans runs " + ", ".join(partRuns) + ", select one run")
+
+        timestamps = []
+        frames = []
+        boxes = []
+
+        for partName, manifest in parts:
+            partPath = os.path.join(self.trajectoriesPath, partName)
+
+            # Memory-mapped columns, only target slices are read from disk
+            segments = np.load(os.path.join(partPath, "segments.npy"), mmap_mode='r')
+            targetSegments = segments[segments[:, 0] == targetID]
+
+            if startTime is not None:
+                targetSegments = targetSegments[targetSegments[:, 4] >= startTime]
+
+            if endTime is not None:
+                targetSegments = targetSegments[targetSegments[:, 3] <= endTime]
+
+            if len(targetSegments) == 0:
+                continue
+
+            partTimestamps = np.load(os.path.join(partPath, "timestamp.npy"), mmap_mode='r')
+            partFrames = np.load(os.path.join(partPath, "frame.npy"), mmap_mode='r')
+            partBoxes = np.load(os.path.join(partPath, "box.npy"), mmap_mode='r')
+
+            for segment in targetSegments:
+                firstRow = int(segment[1])
+                lastRow = firstRow + int(segment[2])
+
+                timestamps.append(np.array(partTimestamps[firstRow:lastRow]))
+                frames.append(np.array(partFrames[firstRow:lastRow]))
+                boxes.append(np.array(partBoxes[firstRow:lastRow]))
+
+        if len(timestamps) == 0:
+            return np.zeros(0, dtype=np.float64), np.zeros(0, dtype=np.int64), np.zeros((0, 4), dtype=np.float32)
+
+        timestamps = np.concatenate(timestamps)
+        frames = np.concatenate(frames)
+        boxes = np.concatenate(boxes)
+
+        # Exact time range within segments
+        inRange = np.ones(len(timestamps), dtype=bool)
+
+        if startTime is not None:
+            inRange &= timestamps >= startTime
+
+        if endTime is not None:
+            inRange &= timestamps <= endTime
+
+        timeOrder = np.argsort(timestamps[inRange], kind='stable')
+
+        return timestamps[inRange][timeOrder], frames[inRange][timeOrder], boxes[inRange][timeOrder]
+
+
+class RecordingReplaySource:
+
+    # Function: Constructor
+    def __init__(self, recordPath, replayRealtime):
+
+        # Build Halo spinner
+        self.systemResponse = Halo(spinner='dots')
+
+        self.recordPath = str(recordPath)
+        self.replayRealtime = int(replayRealtime)
+
+        self.chunks = []
+        self.timestamps = []
+        selections = []
+
+        # One manifest line per written chunk
+        if os.path.isfile(os.path.join(self.recordPath, "manifest.jsonl")):
+            with open(os.path.join(self.recordPath, "manifest.jsonl"), 'r') as manifestData:
+                for manifestLine in manifestData:
+
+                    # Last line may be cut if recording was killed while writing it
+                    try:
+                        manifest = json.loads(manifestLine)
+
+                    except ValueError:
+                        break
+
+                    self.chunks.append({'file': manifest['file'], 'frames': manifest['frames']})
+                    self.timestamps.extend(manifest['timestamps'])
+                    selections.extend(manifest['selections'])
+
+        # Recordings made before, one manifest rewritten on every chunk
+        else:
+            with open(os.path.join(self.recordPath, "manifest.json"), 'r') as manifestData:
+                manifest = json.load(manifestData)
+
+            self.chunks = manifest['chunks']
+            self.timestamps = manifest['timestamps']
+            selections = manifest['selections']
+
+        self.selections = collections.deque(selections)
+
+        # Timestamps of frames in written chunks only
+        self.totalFrames = sum(int(chunk['frames']) for chunk in self.chunks)
+        self.timestamps = self.timestamps[:self.totalFrames]
+
+        # Replay position
+        self.chunkIndex = -1
+        self.chunkFrames = None
+        self.chunkOffset = 0
+        self.frameIndex = 0
+        self.replayStart = None
+
+        systemResponseMessage = "\n[INFO] Replaying " + str(self.totalFrames) + " frames from " + self.recordPath + ".\n"
+        self.systemResponse.text_color = "blue"
+        self.systemResponse.info(systemResponseMessage)
+
+    # Function: loadChunk
+    def loadChunk(self, chunkIndex):
+
+        chunkFile = os.path.join(self.recordPath, self.chunks[chunkIndex]['file'])
+
+        # Raw chunks are memory-mapped copy-on-write, boxes are drawn on frames
+        if chunkFile.endswith(".npy"):
+            return np.load(chunkFile, mmap_mode='c')
+
+        with np.load(chunkFile) as chunkData:
+            return chunkData['frames']
+
+    # Function: hasFrames
+    def hasFrames(self):
+
+        return self.frameIndex < self.totalFrames
+
+    # Function: read
+    def read(self):
+
+        if not self.hasFrames():
+            return False, None
+
+        # Next chunk when current one is consumed
+        while self.chunkFrames is None or self.chunkOffset >= len(self.chunkFrames):
+            self.chunkIndex = self.chunkIndex + 1
+            self.chunkFrames = self.loadChunk(self.chunkIndex)
+            self.chunkOffset = 0
+
+        # Wait until recorded frame time, as fast as possible otherwise
+        if self.replayRealtime == 1:
+
+            if self.replayStart is None:
+                self.replayStart = time.perf_counter()
+
+            waitTime = self.replayStart + self.timestamps[self.frameIndex] - self.timestamps[0] - time.perf_counter()
+
+            if waitTime > 0:
+                time.sleep(waitTime)
+
+        dataReplayed = self.chunkFrames[self.chunkOffset]
+
+        self.chunkOffset = self.chunkOffset + 1
+        self.frameIndex = self.frameIndex + 1
+
+        return True, dataReplayed
+
+    # Function: receive, same contract as YarpImagePort.receive
+    def receive(self):
+
+        return self.read()[1]
+
+    # Function: getTimestamp
+    def getTimestamp(self):
+
+        # Seconds from first recorded frame to last replayed frame
+        if self.frameIndex == 0:
+            return 0.0
+
+        return self.timestamps[self.frameIndex - 1] - self.timestamps[0]
+
+    # Function: getSelection
+    def getSelection(self):
+
+        # Selection made on last replayed frame, None if operator did not select there
+        frameIndex = self.frameIndex - 1
+
+        while len(self.selections) > 0 and int(self.selections[0]['frame']) < frameIndex:
+            self.selections.popleft()
+
+        if len(self.selections) == 0 or int(self.selections[0]['frame']) != frameIndex:
+            return None
+
+        selection = self.selections.popleft()
+
+        return [tuple(box) for box in selection['boxes']], [tuple(color) for color in selection['colors']]
+
+    # Function: release
+    def release(self):
+
+        self.chunkFrames = None
+
+
+class FrameCaptureStage:
+
+    # Function: Constructor
+    def __init__(self, captureSource, yarpReceive, capturePolicy, captureQueueSize):
+
+        # Build Halo spinner
+        self.systemResponse = Halo(spinner='dots')
+
+        # Capture source: cv2.VideoCapture or YarpImagePort
+        self.captureSource = captureSource
+        self.yarpReceive = int(yarpReceive)
 
-                # Convert image from string to int
-                imageWidth = int(imageWidth)
-                imageHeight = int(imageHeight)
+        # Capture policy: latest keeps only newest frames, lossless blocks producer when queue is full
+        if str(capturePolicy) == "lossless":
+            self.capturePolicy = "lossless"
 
-                # Exit loop
-                loopControlFileExists = 1
+        else:
+            self.capturePolicy = "latest"
 
-            except:
+        # Video files are never dropped, frames are decoded as fast as they are tracked
+        if self.yarpReceive == 0 and isinstance(captureSource, cv2.VideoCapture) and captureSource.get(cv2.CAP_PROP_FRAME_COUNT) > 0:
+            self.capturePolicy = "lossless"
 
-                systemResponseMessage = "\n[ERROR] Sorry, config.ini not founded, waiting 4 seconds to the next check ...\n"
-                self.systemResponse.text_color = "red"
-                self.systemResponse.fail(systemResponseMessage)
-                time.sleep(4)
+        # Build bounded ring buffer
+        self.captureQueueSize = max(1, int(captureQueueSize))
+        self.frameBuffer = collections.deque()
+        self.frameCondition = threading.Condition()
 
-        systemResponseMessage = "\n[INFO] Data obtained correctly.\n"
+        # Build counters
+        self.capturedFrames = 0
+        self.droppedFrames = 0
+
+        # YARP image ports reuse their buffers, copy frames unless the port keeps enough buffers for a blocking producer.
+        # Latest policy producer never waits, its ring would wrap onto the frame being tracked
+        self.copyFrames = self.yarpReceive == 1 and (self.capturePolicy == "latest" or int(getattr(captureSource, 'bufferCount', 1)) < self.captureQueueSize + 2)
+
+        # Copies go to a fixed pool of frames: queued frames, frame being tracked and frame being copied
+        self.freeFrames = collections.deque([None] * (self.captureQueueSize + 2))
+        self.heldFrame = None
+
+        # Build producer thread
+        self.loopControlCapture = 1
+        self.captureFinished = 0
+        self.captureThread = threading.Thread(target=self.captureFrames, daemon=True)
+        self.captureThread.start()
+
+        systemResponseMessage = "\n[INFO] Capture stage started with " + str(self.capturePolicy) + " policy and " + str(self.captureQueueSize) + " frames buffer.\n"
         self.systemResponse.text_color = "green"
         self.systemResponse.succeed(systemResponseMessage)
 
-        return videoSource, imageWidth, imageHeight, trackerType, yarpSend, yarpReceive
-
-    # Function: checkYARPInstalled
-    def checkYARPInstalled(self):
+    # Function: captureFrames
+    def captureFrames(self):
 
-        try:
-            import yarp
-            yarpInstalled = 1
+        while int(self.loopControlCapture) == 1:
 
-        except:
-            systemResponseMessage = "\n[ERROR] Sorry, YARP middleware not installed. Using not YARP mode.\n"
-            self.systemResponse.text_color = "red"
-            self.systemResponse.fail(systemResponseMessage)
+            try:
+                # Grab from selected source
+                if self.yarpReceive == 1:
+                    dataCaptured = self.captureSource.receive()
+                    success = dataCaptured is not None
 
-            yarpInstalled = 0
+                else:
+                    success, dataCaptured = self.captureSource.read()
 
-        return yarpInstalled
+            except:
+                success = False
+                dataCaptured = None
 
-    # Function: getObjectTracker
-    def getObjectTracker(self):
+            # End of stream or broken source
+            if not success or dataCaptured is None:
 
-        objectTracker = cv2.MultiTracker_create()
+                # Live YARP sources can return empty reads, keep waiting
+                if self.yarpReceive == 1:
+                    continue
 
-        return objectTracker
+                with self.frameCondition:
+                    self.captureFinished = 1
+                    self.frameCondition.notify_all()
 
-    # Function: getTracker
-    def getTracker(self, trackerType):
+                break
 
-        if trackerType == self.objectTrackerTypes[0]:
-            tracker = cv2.TrackerBoosting_create()
+            if self.copyFrames:
+                dataCaptured = self.copyFrame(dataCaptured)
 
-        elif trackerType == self.objectTrackerTypes[1]:
-            tracker = cv2.TrackerMIL_create()
+            with self.frameCondition:
 
-        elif trackerType == self.objectTrackerTypes[2]:
-            tracker = cv2.TrackerKCF_create()
+                if self.capturePolicy == "lossless":
 
-        elif trackerType == self.objectTrackerTypes[3]:
-            tracker = cv2.TrackerTLD_create()
+                    # Wait until consumer frees space, never drop frames
+                    while len(self.frameBuffer) >= self.captureQueueSize and int(self.loopControlCapture) == 1:
+                        self.frameCondition.wait(0.1)
 
-        elif trackerType == self.objectTrackerTypes[4]:
-            tracker = cv2.TrackerMedianFlow_create()
+                elif len(self.frameBuffer) >= self.captureQueueSize:
 
-        elif trackerType == self.objectTrackerTypes[5]:
-            tracker = cv2.TrackerGOTURN_create()
+                    # Drop stale frames, only newest frames are kept
+                    self.releaseFrame(self.frameBuffer.popleft())
+                    self.droppedFrames = self.droppedFrames + 1
 
-        elif trackerType == self.objectTrackerTypes[6]:
-            tracker = cv2.TrackerMOSSE_create()
+                self.frameBuffer.append(dataCaptured)
+                self.capturedFrames = self.capturedFrames + 1
+                self.frameCondition.notify_all()
 
-        elif trackerType == self.objectTrackerTypes[7]:
-            tracker = cv2.TrackerCSRT_create()
+    # Function: getFrame
+    def getFrame(self):
 
-        else:
-            tracker = cv2.TrackerCSRT_create()
+        with self.frameCondition:
 
-        return tracker
+            while len(self.frameBuffer) == 0 and int(self.captureFinished) == 0 and int(self.loopControlCapture) == 1:
+                self.frameCondition.wait(0.1)
 
-    # Function: systemInfo
-    def systemInfo(self):
+            if len(self.frameBuffer) == 0:
+                return None
 
-        print("\n**************************************************************************")
-        print("User controller:")
-        print("**************************************************************************\n")
-        print("1. Select region of interest with mouse.")
-        print("2. Press enter to save region of interest to be tracked.")
-        print("3. Press q to ends region selection or press c to continue selecting more regions.")
-        print("4. Press u with program is working to update or re-select region of interest.")
+            # Latest policy only cares about newest frame
+            if self.capturePolicy == "latest":
+                self.droppedFrames = self.droppedFrames + len(self.frameBuffer) - 1
+                dataCaptured = self.frameBuffer.pop()
 
-    # Function: initializeCaptureDevices
-    def initializaCaptureDevices(self, videoSource):
+                while len(self.frameBuffer) > 0:
+                    self.releaseFrame(self.frameBuffer.popleft())
 
-        self.systemResponse.text = "Initializing capture device ..."
-        self.systemResponse.text_color = "blue"
-        self.systemResponse.start()
+            else:
+                dataCaptured = self.frameBuffer.popleft()
 
-        # If read from local webcam
-        if str(videoSource) == "0":
-            captureDevice = cv2.VideoCapture(0)
+            # Previous frame is not tracked anymore, its pool frame can be reused
+            self.releaseFrame(self.heldFrame)
+            self.heldFrame = dataCaptured
 
-        # If video file or IP camera
-        else:
-            captureDevice = cv2.VideoCapture(str(videoSource))
+            self.frameCondition.notify_all()
 
-        # Variable to to prevent dark frame at staring webcam
-        loopControlGetFirstFrame = 0
+        return dataCaptured
 
-        while int(loopControlGetFirstFrame) < 5:
-            success, dataToSolve = captureDevice.read()
+    # Function: copyFrame
+    def copyFrame(self, dataCaptured):
 
-            # Increase loopControlGetFirstFrame
-            loopControlGetFirstFrame = loopControlGetFirstFrame + 1
+        # Pool always has a free frame: queue, tracked frame and this copy never exceed its size
+        with self.frameCondition:
+            poolFrame = self.freeFrames.popleft()
 
-        self.systemResponse.stop()
+        # Frames are allocated once, again only if image size or type changes
+        if poolFrame is None or poolFrame.shape != dataCaptured.shape or poolFrame.dtype != dataCaptured.dtype:
+            poolFrame = np.empty_like(dataCaptured)
 
-        return captureDevice
+        np.copyto(poolFrame, dataCaptured)
 
-    # Function: getDataToSolve
-    def getDataToSolve(self, yarpReceive, inputImagePort, imageWidth, imageHeight):
+        return poolFrame
 
-        # Receive from selected source
-        if int(yarpReceive) == 1:
-            dataToSolve = inputImagePort.receive()
+    # Function: releaseFrame
+    def releaseFrame(self, dataCaptured):
 
-        # If not YARP mode
-        else:
-            success, dataToSolve = inputImagePort.read()
+        # Called with frame condition held, only pool frames are returned
+        if self.copyFrames and dataCaptured is not None:
+            self.freeFrames.append(dataCaptured)
 
-        # Resize data to solved
-        dataToSolve = cv2.resize(dataToSolve, (imageWidth, imageHeight))
+    # Function: read, same contract as cv2.VideoCapture.read
+    def read(self):
 
-        return dataToSolve
+        dataCaptured = self.getFrame()
 
-    # Function: getTargets
-    def getTargets(self, dataToSolve):
+        return dataCaptured is not None, dataCaptured
 
-        # Build boxes and colors arrays
-        boxes = []
-        colors = []
+    # Function: receive, same contract as YarpImagePort.receive
+    def receive(self):
 
-        loopControlTargetSelection = 0
+        return self.getFrame()
 
-        while int(loopControlTargetSelection) == 0:
+    # Function: getStatistics
+    def getStatistics(self):
 
-            # Call to interactive GUI selectROI to select the target box
-            box = cv2.selectROI('[PROCESSED] multipleObjectTracker2D', dataToSolve)
+        with self.frameCondition:
+            queueDepth = len(self.frameBuffer)
 
-            # Add region of interest to boxes
-            boxes.append(box)
+        return self.capturedFrames, self.droppedFrames, queueDepth
 
-            # Select random color to tracker object
-            colors.append((randint(0, 255), randint(0, 255), randint(0, 255)))
+    # Function: close
+    def close(self):
 
-            systemResponseMessage = "\n[INFO] Target selected correctly.\n"
-            self.systemResponse.text_color = "blue"
-            self.systemResponse.info(systemResponseMessage)
+        with self.frameCondition:
+            self.loopControlCapture = 0
+            self.frameCondition.notify_all()
 
-            systemResponseMessage = "\n[INFO] Enter q to ends selection. Enter c to select an additional target.\n"
-            self.systemResponse.text_color = "red"
-            self.systemResponse.fail(systemResponseMessage)
+        self.captureThread.join(1)
 
-            # If q is pressed exit selection
-            k = cv2.waitKey(0) & 0xFF
+        systemResponseMessage = "\n[INFO] Capture stage stopped: " + str(self.capturedFrames) + " frames captured, " + str(self.droppedFrames) + " frames dropped.\n"
+        self.systemResponse.text_color = "yellow"
+        self.systemResponse.warn(systemResponseMessage)
 
-            if (k == 113):
-                loopControlTargetSelection = 1
 
-                systemResponseMessage = "\n[INFO] Target selection done correctly.\n"
-                self.systemResponse.text_color = "green"
-                self.systemResponse.succeed(systemResponseMessage)
+class AsyncPortPublisher:
 
-        return boxes, colors
+    # Function: Constructor
+    def __init__(self, outputPort, queueSize, publishFPS):
 
-    # Function: addTargets
-    def addTargets(self, objectTracker, trackerType, dataToSolve, boxes):
+        # Build Halo spinner
+        self.systemResponse = Halo(spinner='dots')
 
-        for box in boxes:
-            objectTracker.add(self.getTracker(trackerType), dataToSolve, box)
+        self.outputPort = outputPort
+        self.portName = outputPort.portName
+        self.queueSize = max(1, int(queueSize))
 
-        return objectTracker
+        # Optional decimation, 0 publishes every frame
+        self.publishInterval = 0.0
 
-    # Function: drawBoxes
-    def drawBoxes(self, boxes, colors, dataToSolve, yarpSend, outputDataPort):
+        if float(publishFPS) > 0:
+            self.publishInterval = 1.0 / float(publishFPS)
 
-        # Draw box and name in data to solve frame for each target
-        for colorIndex, box in enumerate(boxes):
+        self.lastPublishTime = None
 
-            # Prepare point P1: Up-Left box point
-            p1 = (int(box[0]), int(box[1]))
+        # Bounded queue, oldest message dropped when full
+        self.publishQueue = collections.deque()
+        self.publishCondition = threading.Condition()
 
-            # Prepare point P2: Down-Right box point, P1 + horizontal distance and P1 + vertical distance
-            p2 = (int(box[0] + box[2]), int(box[1] + box[3]))
+        # Reused frames, at most queued ones plus one being written and one being filled
+        self.freeFrames = []
 
-            # Draw rectangle in target with random color
-            cv2.rectangle(dataToSolve, p1, p2, colors[colorIndex], 2, 1)
+        # Counters
+        self.publishedMessages = 0
+        self.droppedMessages = 0
+        self.decimatedMessages = 0
 
-            # Prepare target ID
-            targetID = "TARGET: " + str(int(colorIndex + 1))
+        self.publisherRunning = 1
+        self.publisherThread = threading.Thread(target=self.publishMessages, daemon=True)
+        self.publisherThread.start()
 
-            # Draw ID on target box
-            cv2.putText(dataToSolve, targetID, (int(box[0]), int(box[1] + box[3]) + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.7, colors[colorIndex], 2)
+    # Function: getFrame
+    def getFrame(self, dataToSend):
 
-            # Get coordinates
-            dataSolvedResults = str(targetID) + self.getCoordinates(box)
+        # Reuse a free frame with the same size, frames of other sizes are released
+        while len(self.freeFrames) > 0:
+            frame = self.freeFrames.pop()
 
-            systemResponseMessage = "\n[INFO] Results: " + str(dataSolvedResults) + ".\n"
-            self.systemResponse.text_color = "green"
-            self.systemResponse.succeed(systemResponseMessage)
+            if frame.shape == dataToSend.shape and frame.dtype == dataToSend.dtype:
+                return frame
 
-            if int(yarpSend) == 1 and str(outputDataPort) != "null":
+        return np.empty_like(dataToSend)
 
-                # Send output
-                outputDataPort.send(dataSolvedResults)
+    # Function: putMessage
+    def putMessage(self, message):
 
-        return dataToSolve
+        with self.publishCondition:
 
-    # Function: getCoordinates
-    def getCoordinates(self, box):
+            # Drop oldest message, give back its frame
+            if len(self.publishQueue) >= self.queueSize:
+                droppedMessage = self.publishQueue.popleft()
+                self.droppedMessages = self.droppedMessages + 1
 
-        # Get centroid coordinates X and Y
-        x = int(box[0]) + int(box[2] / 2)
-        y = int(box[1]) + int(box[3] / 2)
+                if droppedMessage[0] == "send" and isinstance(droppedMessage[1][0], np.ndarray):
+                    self.freeFrames.append(droppedMessage[1][0])
 
-        coordinatesXY = " X: " + str(x) + ", Y: " + str(y)
+            self.publishQueue.append(message)
+            self.publishCondition.notify()
 
-        return coordinatesXY
+    # Function: send
+    def send(self, dataToSend):
 
-    # Function: processRequest
-    def processRequests(self, trackerType, imageWidth, imageHeight, yarpSend, yarpReceive, outputImagePort, outputDataPort, inputImagePort):
+        # Images are decimated to publish rate before any copy
+        if isinstance(dataToSend, np.ndarray):
+            currentTime = time.perf_counter()
 
-        # Variable to control check targets
-        checkTargets = 0
+            if self.lastPublishTime is not None and currentTime - self.lastPublishTime < self.publishInterval:
+                self.decimatedMessages = self.decimatedMessages + 1
+                return
 
-        # Variable to control loopProcessRequests
-        loopProcessRequests = 0
+            self.lastPublishTime = currentTime
 
-        while int(loopProcessRequests) == 0:
+            # Copy, frame is drawn and reused by tracking thread
+            with self.publishCondition:
+                frame = self.getFrame(dataToSend)
 
-            # Waiting to input data request
-            print("**************************************************************************")
-            print("Waiting for input data request:")
-            print("**************************************************************************")
+            np.copyto(frame, dataToSend)
+            dataToSend = frame
 
-            systemResponseMessage = "\n[INFO] Waiting for input data request at " + str(datetime.datetime.now()) + " ...\n"
-            self.systemResponse.text_color = "yellow"
-            self.systemResponse.warn(systemResponseMessage)
+        self.putMessage(("send", (dataToSend,)))
 
-            print("\n**************************************************************************")
-            print("Processing:")
-            print("**************************************************************************\n")
+    # Function: sendResults
+    def sendResults(self, dataSolvedResults):
 
-            try:
-                dataToSolve = self.getDataToSolve(yarpReceive, inputImagePort, imageWidth, imageHeight)
+        # Every target string of a frame is one queued message, frames are dropped never targets
+        self.putMessage(("sendResults", (dataSolvedResults,)))
 
-                if int(checkTargets) == 0:
+    # Function: sendTracks
+    def sendTracks(self, *trackData):
 
-                    # Set targets and add to tracking system
-                    boxes, colors = self.getTargets(dataToSolve)
-                    trackerEngine = self.addTargets(self.getObjectTracker(), trackerType, dataToSolve, boxes)
-                    checkTargets = 1
+        # Track arrays are built for every frame, no copy needed
+        self.putMessage(("sendTracks", trackData))
 
-                    # First frame send base to solve frame
-                    dataSolved = dataToSolve
+    # Function: publishMessages
+    def publishMessages(self):
 
-                else:
-                    # Update tracker engine with new boxes position
-                    success, boxes = trackerEngine.update(dataToSolve)
+        while True:
 
-                    # Draw boxes
-                    dataSolved = self.drawBoxes(boxes, colors, dataToSolve, yarpSend, outputDataPort)
+            with self.publishCondition:
 
-                # Display data solved tracking
-                cv2.imshow('[PROCESSED] multipleObjectTracker2D', dataSolved)
+                while len(self.publishQueue) == 0 and self.publisherRunning == 1:
+                    self.publishCondition.wait()
 
-                # If key u is pressed re-select targets
-                if cv2.waitKey(33) == ord('u'):
-                    checkTargets = 0
+                if len(self.publishQueue) == 0:
+                    break
 
-                if int(yarpSend) == 1 and str(outputImagePort) != "null":
+                methodName, methodArguments = self.publishQueue.popleft()
 
-                    # Send output
-                    outputImagePort.send(dataSolved)
+            # Blocking write outside lock, tracking thread keeps enqueueing
+            try:
+                getattr(self.outputPort, methodName)(*methodArguments)
+                self.publishedMessages = self.publishedMessages + 1
 
             except:
-                systemResponseMessage = "\n[ERROR] Sorry, i couldn´t resolve your request.\n"
+                systemResponseMessage = "\n[ERROR] Sorry, " + str(self.portName) + " message could not be published.\n"
                 self.systemResponse.text_color = "red"
                 self.systemResponse.fail(systemResponseMessage)
 
+            # Written frame is free again
+            if methodName == "send" and isinstance(methodArguments[0], np.ndarray):
+                with self.publishCondition:
+                    self.freeFrames.append(methodArguments[0])
+
+    # Function: close
+    def close(self):
+
+        # Publish queued messages, then close port
+        with self.publishCondition:
+            self.publisherRunning = 0
+            self.publishCondition.notify_all()
+
+        self.publisherThread.join()
+
+        systemResponseMessage = "\n[INFO] " + str(self.portName) + " publisher stopped: " + str(self.publishedMessages) + " published, " + str(self.droppedMessages) + " dropped, " + str(self.decimatedMessages) + " decimated.\n"
+        self.systemResponse.text_color = "blue"
+        self.systemResponse.info(systemResponseMessage)
+
+        self.outputPort.close()
+
 
 class YarpDataPort:
 
@@ -418,6 +4752,52 @@ class YarpDataPort:
         self.yarpBottle.addString(str(dataToSend))
         self.yarpPort.write(self.yarpBottle)
 
+    # Function: sendResults
+    def sendResults(self, dataSolvedResults):
+
+        for dataSolvedResult in dataSolvedResults:
+            self.send(dataSolvedResult)
+
+    # Function: addIntValue, addInt renamed to addInt32 in YARP 3
+    def addIntValue(self, yarpBottle, value):
+
+        if hasattr(yarpBottle, 'addInt32'):
+            yarpBottle.addInt32(int(value))
+
+        else:
+            yarpBottle.addInt(int(value))
+
+    # Function: addFloatValue, addDouble renamed to addFloat64 in YARP 3
+    def addFloatValue(self, yarpBottle, value):
+
+        if hasattr(yarpBottle, 'addFloat64'):
+            yarpBottle.addFloat64(float(value))
+
+        else:
+            yarpBottle.addDouble(float(value))
+
+    # Function: sendTracks
+    def sendTracks(self, frameIndex, timestamp, targetIDs, boxes, confidences, velocities):
+
+        # One message per frame: frame timestamp targets (id x y width height confidence vx vy) ...
+        self.yarpBottle.clear()
+        self.addIntValue(self.yarpBottle, frameIndex)
+        self.addFloatValue(self.yarpBottle, timestamp)
+        self.addIntValue(self.yarpBottle, len(targetIDs))
+
+        for targetID, box, confidence, velocity in zip(targetIDs, boxes, confidences, velocities):
+            targetBottle = self.yarpBottle.addList()
+            self.addIntValue(targetBottle, targetID)
+            self.addIntValue(targetBottle, box[0])
+            self.addIntValue(targetBottle, box[1])
+            self.addIntValue(targetBottle, box[2])
+            self.addIntValue(targetBottle, box[3])
+            self.addFloatValue(targetBottle, confidence)
+            self.addFloatValue(targetBottle, velocity[0])
+            self.addFloatValue(targetBottle, velocity[1])
+
+        self.yarpPort.write(self.yarpBottle)
+
     # Function: close
     def close(self):
 
@@ -431,7 +4811,7 @@ class YarpDataPort:
 class YarpImagePort:
 
     # Function: Constructor
-    def __init__(self, portName, imageWidth, imageHeight):
+    def __init__(self, portName, imageWidth, imageHeight, bufferCount=2):
 
         # Build Halo spinner
         self.systemResponse = Halo(spinner='dots')
@@ -452,29 +4832,70 @@ class YarpImagePort:
         self.portName = portName
         self.yarpPort.open(self.portName)
 
-        # Build image buffer
+        # Build image buffers, at least double buffered so returned frames stay valid while next one arrives
+        self.bufferCount = max(2, int(bufferCount))
+        self.buildBuffers(imageWidth, imageHeight)
+
+    # Function: buildBuffers
+    def buildBuffers(self, imageWidth, imageHeight):
+
         self.imageWidth = int(imageWidth)
         self.imageHeight = int(imageHeight)
-        self.bufferImage = yarp.ImageRgb()
-        self.bufferImage.resize(self.imageWidth, self.imageHeight)
-        self.bufferArray = np.ones((self.imageHeight, self.imageWidth, 3), np.uint8)
-        self.bufferImage.setExternal(self.bufferArray.data, self.bufferArray.shape[1], self.bufferArray.shape[0])
+        self.bufferIndex = 0
+
+        # YARP RGB images on external memory and preallocated BGR frames
+        self.bufferImages = []
+        self.bufferArrays = []
+        self.frameArrays = []
+
+        for bufferIndex in range(0, self.bufferCount):
+            bufferArray = np.zeros((self.imageHeight, self.imageWidth, 3), np.uint8)
+            bufferImage = yarp.ImageRgb()
+            bufferImage.resize(self.imageWidth, self.imageHeight)
+            bufferImage.setExternal(bufferArray.data, bufferArray.shape[1], bufferArray.shape[0])
+
+            self.bufferImages.append(bufferImage)
+            self.bufferArrays.append(bufferArray)
+            self.frameArrays.append(np.zeros((self.imageHeight, self.imageWidth, 3), np.uint8))
+
+    # Function: getNextBuffer
+    def getNextBuffer(self):
+
+        self.bufferIndex = (self.bufferIndex + 1) % self.bufferCount
+
+        return self.bufferIndex
 
     # Function: receive
     def receive(self):
 
         image = self.yarpPort.read()
-        self.bufferImage.copy(image)
-        assert self.bufferArray.__array_interface__['data'][0] == self.bufferImage.getRawImage().__int__()
-        image = self.bufferArray[:, :, ::-1]
 
-        return self.bufferArray
+        if image is None:
+            return None
+
+        # Source size changed, rebuild buffers once
+        if image.width() != self.imageWidth or image.height() != self.imageHeight:
+            self.buildBuffers(image.width(), image.height())
+
+        # Copy from YARP into external memory, then RGB to BGR into preallocated frame
+        bufferIndex = self.getNextBuffer()
+        self.bufferImages[bufferIndex].copy(image)
+        cv2.cvtColor(self.bufferArrays[bufferIndex], cv2.COLOR_RGB2BGR, dst=self.frameArrays[bufferIndex])
+
+        return self.frameArrays[bufferIndex]
 
     # Function: send
     def send(self, dataToSend):
 
-        self.bufferArray[:,:] = dataToSend
-        self.yarpPort.write(self.bufferImage)
+        bufferIndex = self.getNextBuffer()
+
+        # Resize into preallocated frame only if size does not match
+        if dataToSend.shape[1] != self.imageWidth or dataToSend.shape[0] != self.imageHeight:
+            dataToSend = cv2.resize(dataToSend, (self.imageWidth, self.imageHeight), dst=self.frameArrays[bufferIndex])
+
+        # BGR to RGB directly into YARP external memory
+        cv2.cvtColor(dataToSend, cv2.COLOR_BGR2RGB, dst=self.bufferArrays[bufferIndex])
+        self.yarpPort.write(self.bufferImages[bufferIndex])
 
     # Function: close
     def close(self):
@@ -486,9 +4907,85 @@ class YarpImagePort:
         self.yarpPort.close()
 
 
+# Function: processBatchJob
+def processBatchJob(batchJob):
+
+    trackerType, imageWidth, imageHeight, videoFile, seedsFile, outputFile, configurationData = batchJob
+
+    # One process per core, avoid OpenCV threads oversubscription
+    cv2.setNumThreads(1)
+
+    try:
+        # Build worker tracker, headless and single threaded, with configuration read by parent
+        multipleObjectTracker2D = MultipleObjectTracker2D()
+        multipleObjectTracker2D.setConfigurationData(configurationData)
+        multipleObjectTracker2D.getTrackerConfiguration()
+        multipleObjectTracker2D.getDetectionConfiguration()
+        multipleObjectTracker2D.getTrackStoreConfiguration()
+        multipleObjectTracker2D.displayOutput = 0
+        multipleObjectTracker2D.trackerThreads = 1
+
+        processedFrames, processedTracks = multipleObjectTracker2D.processVideoFile(trackerType, imageWidth, imageHeight, videoFile, seedsFile, outputFile)
+
+    except Exception as batchError:
+        return videoFile, 0, 0, str(batchError)
+
+    return videoFile, processedFrames, processedTracks, None
+
+
+# Function: processBenchmarkJob
+def processBenchmarkJob(benchmarkJob):
+
+    trackerType, targetsNumber, imageWidth, imageHeight, benchmarkFrames, configurationData = benchmarkJob
+
+    try:
+        # Build benchmark tracker with tracker engine configuration read by parent
+        multipleObjectTracker2D = MultipleObjectTracker2D()
+        multipleObjectTracker2D.setConfigurationData(configurationData)
+        multipleObjectTracker2D.getTrackerConfiguration()
+
+        benchmarkResults = multipleObjectTracker2D.runTrackerBenchmark(trackerType, targetsNumber, imageWidth, imageHeight, benchmarkFrames)
+
+    except Exception as benchmarkError:
+        return benchmarkJob, None, str(benchmarkError)
+
+    return benchmarkJob, benchmarkResults, None
+
+
+# Function: getArguments
+def getArguments():
+
+    argumentParser = argparse.ArgumentParser(description="Multiple Object Tracker 2D")
+    argumentParser.add_argument('--verbose', action='store_true', help="list every optional setting read from config.ini")
+    argumentParser.add_argument('--batch', nargs='+', metavar='VIDEO', help="process video files headless and write tracks to disk")
+    argumentParser.add_argument('--seeds', default=None, help="seeds file with one x,y,width,height target per line, default <video>.seeds")
+    argumentParser.add_argument('--output', default='../tracks', help="batch output directory")
+    argumentParser.add_argument('--workers', type=int, default=0, help="batch worker processes, 0 uses one per core")
+    argumentParser.add_argument('--benchmark', action='store_true', help="benchmark trackers on synthetic scenes")
+    argumentParser.add_argument('--benchmark-trackers', default='', help="comma separated tracker types, default every tracker type")
+    argumentParser.add_argument('--benchmark-targets', default='1,5,10', help="comma separated target counts")
+    argumentParser.add_argument('--benchmark-resolutions', default='640x480,1280x720', help="comma separated WIDTHxHEIGHT resolutions")
+    argumentParser.add_argument('--benchmark-frames', type=int, default=150, help="frames per benchmark run")
+    argumentParser.add_argument('--benchmark-output', default='../benchmark.csv', help="benchmark results CSV file")
+    argumentParser.add_argument('--replay', default=None, metavar='RECORDING', help="replay a recording directory instead of live input")
+    argumentParser.add_argument('--replay-realtime', action='store_true', help="replay at recorded speed, as fast as possible otherwise")
+    argumentParser.add_argument('--replay-output', default='../replay.tracks.csv', help="replayed tracks CSV file")
+    argumentParser.add_argument('--trajectory', default=None, metavar='ID', help="export one target trajectory from saved trajectories")
+    argumentParser.add_argument('--trajectory-path', default='../trajectories', help="saved trajectories directory")
+    argumentParser.add_argument('--trajectory-start', default=None, help="trajectory start time, epoch seconds or ISO date and time")
+    argumentParser.add_argument('--trajectory-end', default=None, help="trajectory end time, epoch seconds or ISO date and time")
+    argumentParser.add_argument('--trajectory-run', default=None, help="run of the target, required when time range spans runs")
+    argumentParser.add_argument('--trajectory-output', default='../trajectory.csv', help="exported trajectory CSV file")
+
+    return argumentParser.parse_args()
+
+
 # Function: main
 def main():
 
+    # Get command line arguments
+    arguments = getArguments()
+
     print("**************************************************************************")
     print("**************************************************************************")
     print("                 Program: Multiple Object Tracker 2D                      ")
@@ -501,6 +4998,7 @@ def main():
 
     # Build multipleObjectTracker2D object
     multipleObjectTracker2D = MultipleObjectTracker2D()
+    multipleObjectTracker2D.verboseOutput = int(arguments.verbose)
 
     # Get system platform
     systemPlatform, systemRelease = multipleObjectTracker2D.getSystemPlatform()
@@ -508,6 +5006,76 @@ def main():
     # Get authentication data
     videoSource, imageWidth, imageHeight, trackerType, yarpSend, yarpReceive = multipleObjectTracker2D.getAuthenticationData()
 
+    # Export saved trajectory of one target
+    if arguments.trajectory is not None:
+
+        multipleObjectTracker2D.processTrajectoryRequest(arguments.trajectory_path, arguments.trajectory, arguments.trajectory_start, arguments.trajectory_end, arguments.trajectory_run, arguments.trajectory_output)
+
+        print("**************************************************************************")
+        print("Program finished")
+        print("**************************************************************************")
+        print("\nmultipleObjectTracker2D program finished correctly.\n")
+
+        return
+
+    # Headless batch mode for offline video files
+    if arguments.batch is not None:
+
+        multipleObjectTracker2D.processBatchRequests(trackerType, imageWidth, imageHeight, arguments.batch, arguments.seeds, arguments.output, arguments.workers)
+
+        print("**************************************************************************")
+        print("Program finished")
+        print("**************************************************************************")
+        print("\nmultipleObjectTracker2D program finished correctly.\n")
+
+        return
+
+    # Offline tracker benchmark on synthetic scenes
+    if arguments.benchmark:
+
+        multipleObjectTracker2D.processBenchmarkRequests(arguments.benchmark_trackers, arguments.benchmark_targets, arguments.benchmark_resolutions, arguments.benchmark_frames, arguments.benchmark_output)
+
+        print("**************************************************************************")
+        print("Program finished")
+        print("**************************************************************************")
+        print("\nmultipleObjectTracker2D program finished correctly.\n")
+
+        return
+
+    # Get capture stage configuration
+    captureThread, capturePolicy, captureQueueSize = multipleObjectTracker2D.getCaptureConfiguration()
+
+    # Get statistics configuration
+    statisticsEnabled, statisticsPort = multipleObjectTracker2D.getStatisticsConfiguration()
+
+    # Multi-stream server, one process for every configured source, replay of one recording takes precedence
+    if str(multipleObjectTracker2D.getConfigurationValue('Streams', 'stream-sources', '')).strip() != "" and arguments.replay is None:
+
+        multipleObjectTracker2D.getTrackerConfiguration()
+
+        # Streams without YARP if not installed
+        if int(yarpSend) == 1 or int(yarpReceive) == 1:
+
+            if int(multipleObjectTracker2D.checkYARPInstalled()) == 1:
+                yarp.Network.init()
+
+            else:
+                yarpSend = 0
+                yarpReceive = 0
+
+        multipleObjectTracker2D.processStreamRequests(trackerType, imageWidth, imageHeight, yarpSend, yarpReceive)
+
+        print("**************************************************************************")
+        print("Program finished")
+        print("**************************************************************************")
+        print("\nmultipleObjectTracker2D program finished correctly.\n")
+
+        return
+
+    # Replay reads recorded frames, never YARP input
+    if arguments.replay is not None:
+        yarpReceive = 0
+
     # Check YARP installed if YARP is required
     if int(yarpSend) == 1 or int(yarpReceive) == 1:
 
@@ -518,36 +5086,97 @@ def main():
             # Init Yarp network
             yarp.Network.init()
 
+            # Create Yarp statistics port
+            if int(statisticsEnabled) == 1 and int(statisticsPort) == 1:
+                multipleObjectTracker2D.performanceMonitor.statisticsPort = YarpDataPort("/multipleObjectTracker2D/stats:o")
+
             # Create Yarp ports
             if int(yarpSend) == 1:
                 outputImagePort = YarpImagePort("/multipleObjectTracker2D/img:o", imageWidth, imageHeight)
                 outputDataPort = YarpDataPort("/multipleObjectTracker2D/data:o")
 
+                # Slow subscribers never stall tracking
+                outputImagePort, outputDataPort = multipleObjectTracker2D.getOutputPublishers(outputImagePort, outputDataPort)
+
             else:
                 outputImagePort = "null"
                 outputDataPort = "null"
 
             if int(yarpReceive) == 1:
-                inputImagePort = YarpImagePort("/multipleObjectTracker2D/img:i", imageWidth, imageHeight)
+                # Enough buffers to keep every queued frame without copies with lossless capture policy
+                inputImagePort = YarpImagePort("/multipleObjectTracker2D/img:i", imageWidth, imageHeight, captureQueueSize + 2)
 
             else:
-                inputImagePort = multipleObjectTracker2D.initializaCaptureDevices(videoSource)
+                inputImagePort = multipleObjectTracker2D.startCaptureDevices(videoSource, arguments.replay, int(arguments.replay_realtime))
 
         else:
             outputImagePort = "null"
             outputDataPort = "null"
-            inputImagePort = multipleObjectTracker2D.initializaCaptureDevices(videoSource)
+            inputImagePort = multipleObjectTracker2D.startCaptureDevices(videoSource, arguments.replay, int(arguments.replay_realtime))
 
     else:
         outputImagePort = "null"
         outputDataPort = "null"
-        inputImagePort = multipleObjectTracker2D.initializaCaptureDevices(videoSource)
+        inputImagePort = multipleObjectTracker2D.startCaptureDevices(videoSource, arguments.replay, int(arguments.replay_realtime))
+
+    # Get tracker engine configuration
+    multipleObjectTracker2D.getTrackerConfiguration()
+
+    # Get detection configuration
+    multipleObjectTracker2D.getDetectionConfiguration()
+
+    # Get track store configuration
+    multipleObjectTracker2D.getTrackStoreConfiguration()
+
+    # Replay feeds every recorded frame, record live frames and resume from snapshots if enabled
+    if arguments.replay is not None:
+        captureThread = 0
+
+    else:
+        multipleObjectTracker2D.getRecordingConfiguration()
+        multipleObjectTracker2D.getSnapshotConfiguration(trackerType)
+        multipleObjectTracker2D.getTrajectoryConfiguration()
+        multipleObjectTracker2D.getReloadConfiguration()
+
+    # Capture device warmed up while stages were configured
+    inputImagePort = multipleObjectTracker2D.waitCaptureDevices(inputImagePort)
+
+    # Decouple frame capture from tracking with a producer thread
+    if int(captureThread) == 1:
+        inputImagePort = FrameCaptureStage(inputImagePort, yarpReceive, capturePolicy, captureQueueSize)
 
     # Show system info
     multipleObjectTracker2D.systemInfo()
 
-    # Process input requests
-    multipleObjectTracker2D.processRequests(trackerType, imageWidth, imageHeight, yarpSend, yarpReceive, outputImagePort, outputDataPort, inputImagePort)
+    try:
+        # Process recorded requests
+        if arguments.replay is not None:
+            multipleObjectTracker2D.processReplayRequests(trackerType, imageWidth, imageHeight, yarpSend, outputImagePort, outputDataPort, inputImagePort, arguments.replay_output)
+
+        # Process input requests
+        else:
+            multipleObjectTracker2D.processRequests(trackerType, imageWidth, imageHeight, yarpSend, yarpReceive, outputImagePort, outputDataPort, inputImagePort)
+
+    # Recordings, snapshots and trajectories are closed even if processing failed
+    finally:
+
+        # Write last recorded chunk
+        if multipleObjectTracker2D.frameRecorder is not None:
+            multipleObjectTracker2D.frameRecorder.close()
+
+        # Wait for last snapshot
+        if multipleObjectTracker2D.trackSnapshot is not None:
+            multipleObjectTracker2D.trackSnapshot.close()
+
+        # Write buffered trajectories
+        if multipleObjectTracker2D.trajectorySink is not None:
+            multipleObjectTracker2D.trajectorySink.close()
+
+    # Stop capture stage
+    if int(captureThread) == 1:
+        captureSource = inputImagePort.captureSource
+        inputImagePort.close()
+        inputImagePort = captureSource
 
     # Close Yarp ports
     if int(yarpSend) == 1 and int(yarpInstalled) == 1:
@@ -557,6 +5186,9 @@ def main():
     if int(yarpReceive) == 1 and int(yarpInstalled) == 1:
         inputImagePort.close()
 
+    if str(multipleObjectTracker2D.performanceMonitor.statisticsPort) != "null":
+        multipleObjectTracker2D.performanceMonitor.statisticsPort.close()
+
     print("**************************************************************************")
     print("Program finished")
     print("**************************************************************************")